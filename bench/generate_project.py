@@ -0,0 +1,119 @@
+"""
+Synthetic target project generator for the benchmark harness.
+
+Example:
+    python bench/generate_project.py --out /tmp/synthetic --files 1000 --fanout 3 --cycles 10
+"""
+import argparse
+import os
+import random
+import shutil
+
+NOISE_SNIPPETS = [
+    "import os\n",                        # W0611 unused-import
+    "import sys\n",                       # W0611 unused-import
+]
+
+
+def _module_path(index: int, packages: int) -> str:
+    """pkg3/mod_42.py"""
+    return f"pkg{index % packages}/mod_{index}.py"
+
+
+def _module_name(index: int, packages: int) -> str:
+    return _module_path(index, packages)[:-len(".py")].replace("/", ".")
+
+
+def generate_project(out_dir: str, files: int = 100, fanout: int = 2, cycles: int = 0,
+                     lint_noise: float = 0.3, functions: int = 5, packages: int = 4, seed: int = 0) -> dict:
+    """
+    Writes a synthetic project made of `files` modules spread over `packages` packages.
+
+    - fanout: number of project imports per module (always towards earlier modules -> DAG).
+    - cycles: number of back edges injected (later module imported by an earlier one -> import cycles).
+    - lint_noise: probability that a module gets unused imports / bad names.
+    - functions: number of functions per module (controls file size).
+
+    Returns a description of what was generated.
+    """
+    rng = random.Random(seed)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+
+    packages = max(1, min(packages, files))
+    for p in range(packages):
+        os.makedirs(os.path.join(out_dir, f"pkg{p}"), exist_ok=True)
+        with open(os.path.join(out_dir, f"pkg{p}", "__init__.py"), "w", encoding="utf-8") as f:
+            f.write("")
+
+    imports = {i: set(rng.sample(range(i), min(fanout, i))) for i in range(files)}
+    back_edges = 0
+    for _ in range(cycles):
+        if files < 2:
+            break
+        low, high = sorted(rng.sample(range(files), 2))
+        imports[low].add(high)
+        back_edges += 1
+
+    total_bytes = 0
+    for i in range(files):
+        lines = []
+        noisy = rng.random() < lint_noise
+        if noisy:
+            lines.extend(rng.sample(NOISE_SNIPPETS, 1))
+        # "import pkg.mod" (not "from pkg import mod") keeps injected cycles importable
+        for dep in sorted(imports[i]):
+            lines.append(f"import {_module_name(dep, packages)}\n")
+        lines.append("\n\n")
+
+        for k in range(functions):
+            name = f"computeValue{k}" if noisy and k == 0 else f"func_{k}"
+            lines.append(f"def {name}(value, factor=2):\n")
+            lines.append(f"    result = value * factor + {k}\n")
+            lines.append("    if result > 100:\n")
+            lines.append("        result = result % 100\n")
+            lines.append("    return result\n\n\n")
+
+        lines.append("def call_dependencies():\n")
+        if imports[i]:
+            for dep in sorted(imports[i]):
+                lines.append(f"    {_module_name(dep, packages)}.func_1(1)\n")
+        else:
+            lines.append("    return None\n")
+
+        content = "".join(lines)
+        total_bytes += len(content)
+        with open(os.path.join(out_dir, _module_path(i, packages)), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    return {
+        "files": files,
+        "packages": packages,
+        "fanout": fanout,
+        "cycles": back_edges,
+        "lint_noise": lint_noise,
+        "functions": functions,
+        "seed": seed,
+        "bytes": total_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic project for benchmarks")
+    parser.add_argument("--out", required=True, help="Output directory (overwritten)")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--cycles", type=int, default=0)
+    parser.add_argument("--lint-noise", type=float, default=0.3)
+    parser.add_argument("--functions", type=int, default=5)
+    parser.add_argument("--packages", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    info = generate_project(args.out, args.files, args.fanout, args.cycles,
+                            args.lint_noise, args.functions, args.packages, args.seed)
+    print(f"✅ Generated {info['files']} files ({info['bytes']} bytes) in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
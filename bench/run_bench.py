@@ -0,0 +1,153 @@
+"""
+End-to-end benchmark of the swarm against the offline fake LLM.
+
+Example:
+    python bench/run_bench.py --files 200 --fanout 3 --cycles 5 --workers 8 --output bench_200.json
+    python bench/run_bench.py --compare bench_base.json bench_200.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench.generate_project import generate_project  # noqa: E402
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _peak_rss_mb() -> dict:
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def run_benchmark(args) -> dict:
+    # The fake backend reads its settings at import time: configure it before importing the pipeline
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_RATE_LIMIT_RATE"] = str(args.rate_limit_rate)
+    os.environ["LLM_RATE_LIMIT"] = str(args.llm_rate)
+    os.environ["LLM_RATE_LIMIT_MAX"] = str(max(args.llm_rate, float(os.getenv("LLM_RATE_LIMIT_MAX", "5.0"))))
+
+    from main import setup_project_sandbox, run_pipeline
+    from src.utils.llm_cache import set_cache_enabled
+    from src.utils.metrics import get_stage_timings, reset_stage_timings
+    from src.utils.usage import USAGE
+
+    set_cache_enabled(args.cache)
+    work_dir = tempfile.mkdtemp(prefix="swarm_bench_")
+    project_dir = args.project
+    project_info = {"path": project_dir}
+    if project_dir is None:
+        project_dir = os.path.join(work_dir, "synthetic_project")
+        project_info = generate_project(project_dir, args.files, args.fanout, args.cycles,
+                                        args.lint_noise, args.functions, args.packages, args.seed)
+    project_dir = os.path.abspath(project_dir)
+
+    # sandbox/ and logs/ are created relative to the working directory
+    previous_cwd = os.getcwd()
+    os.chdir(work_dir)
+    reset_stage_timings()
+    USAGE.reset()
+    start = time.perf_counter()
+    try:
+        sandboxed_dir = setup_project_sandbox(project_dir)
+        summary = run_pipeline(sandboxed_dir, workers=args.workers)
+    finally:
+        os.chdir(previous_cwd)
+    wall = time.perf_counter() - start
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {
+            "workers": args.workers,
+            "latency": args.latency,
+            "rate_limit_rate": args.rate_limit_rate,
+            "llm_rate": args.llm_rate,
+            "cache": args.cache,
+        },
+        "project": project_info,
+        "wall_seconds": round(wall, 3),
+        "batches": summary["batches"],
+        "levels": summary["levels"],
+        "batches_per_minute": round(summary["batches"] / wall * 60, 2) if wall else None,
+        "stages": get_stage_timings(),
+        "llm_usage": {"total": summary["usage"]["total"], "by_agent": summary["usage"]["by_agent"]},
+        "peak_rss_mb": _peak_rss_mb(),
+        "work_dir": work_dir,
+    }
+
+
+def compare(base_path: str, new_path: str):
+    """Prints the relative change of the wall time, throughput and every stage between two reports."""
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    def row(name, old, cur):
+        delta = f"{(cur - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<24}{old:>12.3f}{cur:>12.3f}{delta:>10}")
+
+    print(f"{'':<24}{base['commit']:>12}{new['commit']:>12}")
+    row("wall_seconds", base["wall_seconds"], new["wall_seconds"])
+    row("batches_per_minute", base["batches_per_minute"] or 0, new["batches_per_minute"] or 0)
+    row("peak_rss_mb.self", base["peak_rss_mb"]["self"], new["peak_rss_mb"]["self"])
+    for stage in sorted(set(base["stages"]) | set(new["stages"])):
+        row(f"stage.{stage}",
+            base["stages"].get(stage, {}).get("seconds", 0.0),
+            new["stages"].get(stage, {}).get("seconds", 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the refactoring swarm offline")
+    parser.add_argument("--project", default=None, help="Existing project to benchmark (default: generate one)")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--cycles", type=int, default=0)
+    parser.add_argument("--lint-noise", type=float, default=0.3)
+    parser.add_argument("--functions", type=int, default=5)
+    parser.add_argument("--packages", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean simulated LLM latency (seconds)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of simulated HTTP 429")
+    parser.add_argument("--llm-rate", type=float, default=1000.0, help="Initial rate limiter requests/second")
+    parser.add_argument("--cache", action="store_true", help="Enable the LLM response cache")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two JSON reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmark(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
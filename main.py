@@ -1,81 +1,295 @@
 import argparse
 import sys
 import os
-import shutil
 import glob
+import json
+import threading
+import time
 import uuid
 from dotenv import load_dotenv
 from importlib_metadata import files
 from langchain_core.messages import HumanMessage
 
 # Import your custom modules
-from src.utils.logger import log_experiment
+from src.utils.logger import log_experiment, flush_logs
 from src.state.AgentState import AgentState
 from src.graph.graph import build_agent_graph
-from time import sleep
-from src.utils.black import run_black
-from src.utils.context import build_project_context
-from src.utils.batching import build_sequential_batches
+from src.utils.black import run_black_batch
+from src.utils.context import init_project_context, get_project_context, refresh_project_context
+from src.utils.batching import (
+    build_dependency_graph, build_layered_batches, build_reverse_graph, get_batch_dependencies, rank_related_files,
+    get_transitive_dependencies
+)
+from src.utils.scheduler import run_wavefront
+from src.utils.llm_cache import set_cache_enabled
+from src.utils.metrics import timed
+from src.utils.source_index import SOURCE_INDEX
+from src.utils.pytest_server import set_pytest_server_enabled
+from src.utils.sandbox import build_sandbox
+from src.utils.checkpoint import get_checkpointer, batch_thread_id, RunManifest
+from src.utils.skip_manifest import SkipManifest, SKIP_MANIFEST_DIRNAME
+from src.utils.work_queue import WorkQueue, run_worker
+from src.utils.tracing import export_traces, set_trace_dir, span, trace_context
+from src.utils.usage import USAGE
+from src.nodes.auditor import THRESHOLD
 
 load_dotenv()
 
 # Configuration
 SANDBOX_ROOT = "./sandbox"
+QUEUE_NAME = ".swarm_queue.sqlite"
 
-def setup_project_sandbox(target_dir: str) -> str:
+def setup_project_sandbox(target_dir: str, reuse: bool = False) -> str:
     """
     Mirrors the target directory into a clean sandbox environment.
     Returns the path to the new sandboxed project root.
+
+    .git, virtualenvs, build outputs, earlier sandboxes and .gitignore'd files are skipped,
+    and files are reflinked when the filesystem allows it, copied otherwise (see src/utils/sandbox.py).
+    With `reuse`, the same sandbox is kept for this project and only changed files are synced.
     """
     # 1. Create sandbox root if it doesn't exist
     if not os.path.exists(SANDBOX_ROOT):
         os.makedirs(SANDBOX_ROOT)
 
-    project_name = os.path.basename(os.path.normpath(target_dir))
-    
-    # 2. Create a unique ID for this run to avoid collisions
+    # 2. Create a unique ID for this run to avoid collisions (unless the sandbox is reused)
     run_id = str(uuid.uuid4())[:8]
-    sandbox_path = os.path.join(SANDBOX_ROOT, f"{project_name}_{run_id}")
-    
-    # 3. Copy the ENTIRE folder tree
+
+    # 3. Mirror the project tree
     # This preserves local imports (e.g., from utils import helper)
-    if os.path.exists(sandbox_path):
-        shutil.rmtree(sandbox_path)
-        
-    shutil.copytree(target_dir, sandbox_path)
+    with timed("sandbox"):
+        sandbox_path, stats = build_sandbox(target_dir, SANDBOX_ROOT, reuse=reuse, run_id=run_id)
+    print(f"📦 Sandbox files: {stats}")
     
     # log_experiment("System", "SANDBOX", f"Mirrored {target_dir} -> {sandbox_path}", "INFO")
     return sandbox_path
 
+def skip_manifest_dir(sandboxed_dir: str) -> str:
+    """Skip manifests live next to the sandboxes (the target project is never written to)."""
+    return os.path.join(os.path.dirname(os.path.abspath(sandboxed_dir)), SKIP_MANIFEST_DIRNAME)
+
+def process_batch(graph, batch, sandboxed_dir, dependency_graph, reverse_graph, manifest=None, resume=False,
+                  skip_manifest=None, raise_errors=False):
+    """
+    Runs the agent graph on one batch of files.
+    Returns the final pylint score, or None if the batch could not be processed.
+
+    With `resume`, a batch recorded as done in the run manifest is skipped, and a batch
+    interrupted mid-graph continues from its last checkpoint.
+    The outcome is recorded in `skip_manifest` (kept with the sandboxes) for later runs.
+    With `raise_errors` (worker mode), a failure is raised instead of returning None, so the
+    queue can retry the batch.
+    """
+    # 1. Prepare Batch Metadata
+    # Convert absolute paths (sandbox) to relative paths for display/agent
+    # e.g. ["/abs/sandbox/inventory.py", "/abs/sandbox/order.py"]
+    
+    batch_relative_paths = [os.path.relpath(f, sandboxed_dir) for f in batch]
+    
+    # Create the string signature: "inventory.py | order.py"
+    files_paths_str = " | ".join(batch_relative_paths)
+    
+    # One LangGraph thread per batch, stable across runs (checkpoints in the sandbox)
+    thread_id = batch_thread_id(batch_relative_paths)
+    config = {"configurable": {"thread_id": thread_id}}
+    if resume and manifest is not None and manifest.is_done(thread_id):
+        print(f"⏭️ Batch already done, skipped: {files_paths_str}")
+        return manifest.get_score(thread_id)
+
+    print(f"\n{'='*60}")
+    print(f"👉 Processing Batch: {files_paths_str}")
+    print(f"{'='*60}")
+
+    # 2. Prepare Code Content (Concatenate all files in batch)
+    full_code_content = ""
+    
+    # (files were formatted once for the whole project, see run_pipeline)
+    for file_path, relative_name in zip(batch, batch_relative_paths):
+        try:
+            full_code_content += f"FILE: {relative_name}\n"
+            full_code_content += SOURCE_INDEX.text(file_path) + "\n\n"
+        except Exception as e:
+            print(f"❌ Failed to read {relative_name}: {e}")
+            if raise_errors:
+                raise
+            return None
+
+    final_score = None
+    try:
+        # 3. Initialize Agent State
+        initial_state = {
+            "messages": [HumanMessage(content=f"Starting analysis on {files_paths_str}")],
+            "filename": files_paths_str,      # Clean string "a.py | b.py"
+            "project_root": sandboxed_dir,    # Critical for imports
+            "code_content": full_code_content,
+            "pylint_score": 0.0,
+            "pylint_msg": "",
+            "test_errors": "",
+            "iteration_count": 0,
+            "convergence_history": [],
+            "fixer_output_hash": "",
+            "fixer_repeated": False,
+            # Pass ALL files in sandbox to context, so the agent knows about files outside the current batch
+            # (built once at startup, includes the files rewritten by earlier batches)
+            "signatures_map": get_project_context(sandboxed_dir), 
+            # Dependencies / dependents of the batch first: only these signatures go in the prompts
+            "context_ranking": [
+                os.path.relpath(f, sandboxed_dir) for f, _ in rank_related_files(batch, dependency_graph, reverse_graph)
+            ],
+            # Files importing each batch file: the AutoFix keeps imports they may use (re-exports)
+            "dependents": {
+                os.path.relpath(f, sandboxed_dir): sorted(os.path.relpath(d, sandboxed_dir)
+                                                          for d in reverse_graph.get(f, ()))
+                for f in batch
+            },
+            "test_file": ""
+        }
+
+        # 4. RUN THE AGENT
+        pending_nodes = graph.get_state(config).next if resume else ()
+        with trace_context(batch_id=thread_id), span("batch", category="batch", files=files_paths_str,
+                                                     bytes=len(full_code_content.encode("utf-8"))):
+            if pending_nodes:
+                # Interrupted batch: continue from the last saved node
+                print(f"🔁 Resuming {files_paths_str} at {', '.join(pending_nodes)}")
+                final_state = graph.invoke(None, config)
+            else:
+                # Fresh start: drop what an earlier run may have left on this thread
+                graph.checkpointer.delete_thread(thread_id)
+                final_state = graph.invoke(initial_state, config)
+
+        # 5. Reporting
+        final_score = final_state.get("pylint_score", 0)
+        print(f"✅ Finished Batch {files_paths_str}")
+        print(f"   - Final Score: {final_score}/10")
+        usage = USAGE.batch_usage(thread_id)
+        print(f"   - LLM: {usage['calls']} calls, {usage['input_tokens']} in / {usage['output_tokens']} out tokens")
+        if manifest is not None:
+            manifest.mark_done(thread_id, batch_relative_paths, final_score)
+        if skip_manifest is not None:
+            dependencies = [os.path.relpath(f, sandboxed_dir) for f in get_transitive_dependencies(batch, dependency_graph)]
+            skip_manifest.record(batch_relative_paths, dependencies, sandboxed_dir,
+                                 final_score, final_state.get("test_errors") == "Passed")
+
+    except Exception as e:
+        print(f"❌ Failed on batch {files_paths_str}: {e}")
+        if raise_errors:
+            raise
+    
+    return final_score
+
 def main():
     # 1. Parse Arguments
     parser = argparse.ArgumentParser(description="AI Refactoring Agent")
-    parser.add_argument("--target_dir", type=str, required=True, help="Path to the folder containing code to fix")
+    parser.add_argument("--target_dir", type=str, default=None, help="Path to the folder containing code to fix")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum number of independent batches processed at the same time")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk LLM response cache")
+    parser.add_argument("--llm-backend", choices=["mistral", "fake"], default=None,
+                        help="LLM backend (default: $LLM_BACKEND or mistral). 'fake' runs offline for benchmarks")
+    parser.add_argument("--warm-pytest", action="store_true",
+                        help="Run tests through a persistent pytest server (fork per run) instead of a new interpreter")
+    parser.add_argument("--reuse-sandbox", action="store_true",
+                        help="Reuse this project's sandbox and only sync the files that changed")
+    parser.add_argument("--resume", type=str, default=None, metavar="SANDBOX",
+                        help="Continue an interrupted run in this sandbox: done batches are skipped")
+    parser.add_argument("--coordinator", action="store_true",
+                        help="Plan the run and put the batches on a durable queue for --worker processes")
+    parser.add_argument("--worker", action="store_true",
+                        help="Process batches from a coordinator's queue (--queue), then exit when it is empty")
+    parser.add_argument("--queue", type=str, default=None,
+                        help=f"Queue database (default for the coordinator: <sandbox>/{QUEUE_NAME})")
+    parser.add_argument("--trace-dir", type=str, default=None,
+                        help="Record spans (nodes, LLM, pylint, pytest, black, file I/O) and write Chrome-trace "
+                             "and OTLP JSON files to this directory (default: $TRACE_DIR)")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Stop starting new Fixer iterations once this many LLM tokens (in + out) are spent")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="Stop starting new Fixer iterations after this many seconds")
     args = parser.parse_args()
 
+    USAGE.set_budgets(tokens=args.token_budget, seconds=args.time_budget)
+
+    if args.trace_dir:
+        set_trace_dir(args.trace_dir)
+
+    if args.warm_pytest:
+        set_pytest_server_enabled(True)
+
+    if args.llm_backend:
+        os.environ["LLM_BACKEND"] = args.llm_backend
+
+    if args.no_cache:
+        set_cache_enabled(False)
+
+    # Worker: everything it needs (sandbox, files) is in the queue
+    if args.worker:
+        if not args.queue:
+            parser.error("--worker requires --queue")
+        count = run_queue_worker(args.queue, workers=args.workers)
+        print(f"\n✅ WORKER_DONE ({count} batches)")
+        return
+
     # 2. Validation
-    if not os.path.exists(args.target_dir):
-        print(f"❌ Dossier {args.target_dir} introuvable.")
-        sys.exit(1)
+    if args.resume:
+        # Resume: the existing sandbox already holds the previous run's outputs, no new copy
+        if not os.path.isdir(args.resume):
+            print(f"❌ Sandbox {args.resume} introuvable.")
+            sys.exit(1)
+        sandboxed_dir = args.resume
+        print(f"🔁 REPRISE SUR : {sandboxed_dir}")
+    else:
+        if not args.target_dir:
+            parser.error("--target_dir is required (unless --resume is given)")
+        if not os.path.exists(args.target_dir):
+            print(f"❌ Dossier {args.target_dir} introuvable.")
+            sys.exit(1)
 
-    print(f"🚀 DEMARRAGE SUR : {args.target_dir}")
-    # log_experiment("System", "STARTUP", f"Target: {args.target_dir}", "INFO")
+        print(f"🚀 DEMARRAGE SUR : {args.target_dir}")
+        # log_experiment("System", "STARTUP", f"Target: {args.target_dir}", "INFO")
 
-    # 3. Setup Sandbox (Critical Safety Step)
-    try:
-        sandboxed_dir = setup_project_sandbox(args.target_dir)
-        print(f"📦 Sandbox créé: {sandboxed_dir}")
-    except Exception as e:
-        print(f"❌ Erreur création sandbox: {e}")
-        # log_experiment("System", "CRITICAL", f"Sandbox creation failed: {e}", "ERROR")
-        sys.exit(1)
-        
-       
+        # 3. Setup Sandbox (Critical Safety Step)
+        try:
+            sandboxed_dir = setup_project_sandbox(args.target_dir, reuse=args.reuse_sandbox)
+            print(f"📦 Sandbox créé: {sandboxed_dir}")
+        except Exception as e:
+            print(f"❌ Erreur création sandbox: {e}")
+            # log_experiment("System", "CRITICAL", f"Sandbox creation failed: {e}", "ERROR")
+            sys.exit(1)
+
+    # 4. Run the swarm on the sandbox
+    if args.coordinator:
+        queue_path = args.queue or os.path.join(sandboxed_dir, QUEUE_NAME)
+        run_coordinator(sandboxed_dir, queue_path, resume=bool(args.resume), target_dir=args.target_dir)
+    else:
+        run_pipeline(sandboxed_dir, workers=args.workers, resume=bool(args.resume), target_dir=args.target_dir)
 
-    # 4. Find Files
+    print("\n✅ MISSION_COMPLETE")
+    print(f"Output available in: {sandboxed_dir}")
+
+def prepare_run(sandboxed_dir: str, resume: bool = False, target_dir: str = None) -> dict:
+    """
+    Everything computed once per run before the agents start, whatever the execution mode:
+    file list, black pre-pass, dependency graph, batches and the batches skipped thanks to
+    the cross-run manifest.
+
+    Returns:
+        Dict with keys: manifest, files, target_dir, dependency_graph, reverse_graph, levels,
+        batches, batch_dependencies, skip_manifest, skipped ({batch index: score})
+    """
+    manifest = RunManifest(sandboxed_dir)
+
+    # 1. Find Files
     # We scan the SANDBOX, not the original directory
     # recursive=True ensures we find files in subfolders
-    files = glob.glob(os.path.join(sandboxed_dir, "**", "*.py"), recursive=True)
+    if resume and manifest.files:
+        # Same files as the interrupted run (the test files it generated are not targets)
+        files = [os.path.join(sandboxed_dir, f) for f in manifest.files]
+        files = [f for f in files if os.path.isfile(f)]
+    else:
+        files = glob.glob(os.path.join(sandboxed_dir, "**", "*.py"), recursive=True)
+        manifest.start([os.path.relpath(f, sandboxed_dir) for f in files], target_dir)
+    if resume:
+        target_dir = manifest.target_dir
     
     # Filter out common non-target files
     # files = [f for f in files if "test_" not in f and "setup.py" not in f and "__init__.py" not in f]
@@ -83,78 +297,188 @@ def main():
     print(f"📂 Found {len(files)} python files to process.")
     
     
-    # 5. Build & Compile Graph
+    # Format every file with black up front (in-process, cached by content)
+    # (skipped on resume: it already ran, and the files now hold the agents' outputs)
+    if not resume:
+        black_report = run_black_batch(files, project_root=sandboxed_dir)
+        print(f"🎨 Black: {black_report['formatted']} formatted, {black_report['unchanged']} unchanged, "
+              f"{black_report['cached']} cached, {len(black_report['failed'])} failed.")
+
+    # 2. Batches
+    # A batch starts as soon as every batch it imports from is finished,
+    # so independent batches run side by side.
+    with timed("batching"):
+        dependency_graph = build_dependency_graph(files, project_root=sandboxed_dir)
+        levels = build_layered_batches(files, dependency_graph)
+        batches = [batch for level in levels for batch in level]
+        batch_dependencies = get_batch_dependencies(batches, dependency_graph)
+        reverse_graph = build_reverse_graph(dependency_graph)
+
+    # Batches unchanged since a run where they passed: outputs restored from that run's sandbox
+    skip_manifest = SkipManifest(target_dir, skip_manifest_dir(sandboxed_dir)) if target_dir else None
+    skipped = {}
+    if skip_manifest is not None:
+        for i, batch in enumerate(batches):
+            relative_batch = [os.path.relpath(f, sandboxed_dir) for f in batch]
+            dependencies = [os.path.relpath(f, sandboxed_dir) for f in get_transitive_dependencies(batch, dependency_graph)]
+            if skip_manifest.can_skip(relative_batch, dependencies, THRESHOLD) and \
+                    skip_manifest.restore(relative_batch, sandboxed_dir):
+                skipped[i] = min(skip_manifest.files[f]["score"] for f in relative_batch)
+        print(f"⏭️ {len(skipped)} batches unchanged since they last passed, skipped.")
+
+    print(f"🧩 {len(batches)} batches in {len(levels)} levels "
+          f"(widths: {[len(level) for level in levels]}).")
+
+    return {
+        "manifest": manifest,
+        "files": files,
+        "target_dir": target_dir,
+        "dependency_graph": dependency_graph,
+        "reverse_graph": reverse_graph,
+        "levels": levels,
+        "batches": batches,
+        "batch_dependencies": batch_dependencies,
+        "skip_manifest": skip_manifest,
+        "skipped": skipped,
+    }
+
+def compile_graph(sandboxed_dir: str):
+    """Agent graph with its SQLite checkpointer (kept in the sandbox). Returns (graph, checkpointer)."""
     # We build the graph once and reuse it for all files
     builder = build_agent_graph()
-    graph = builder.compile()
-    
-      
-    # 6. Execution Loop
-    for batch in build_sequential_batches(files):
-        # 1. Prepare Batch Metadata
-        # Convert absolute paths (sandbox) to relative paths for display/agent
-        # e.g. ["/abs/sandbox/inventory.py", "/abs/sandbox/order.py"]
-        
-        batch_relative_paths = [os.path.relpath(f, sandboxed_dir) for f in batch]
-        
-        # Create the string signature: "inventory.py | order.py"
-        files_paths_str = " | ".join(batch_relative_paths)
-        
-        print(f"\n{'='*60}")
-        print(f"👉 Processing Batch: {files_paths_str}")
-        print(f"{'='*60}")
-
-        # 2. Prepare Code Content (Concatenate all files in batch)
-        full_code_content = ""
-        valid_batch = True
-        
-        for file_path, relative_name in zip(batch, batch_relative_paths):
-            print(f"   🔍 Formatting {relative_name}...")
-            run_black(file_path)
-            
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    full_code_content += f"FILE: {relative_name}\n"
-                    full_code_content += f.read() + "\n\n"
-            except Exception as e:
-                print(f"❌ Failed to read {relative_name}: {e}")
-                valid_batch = False
-                break
-        
-        if not valid_batch: continue
+    checkpointer = get_checkpointer(sandboxed_dir)
+    return builder.compile(checkpointer=checkpointer), checkpointer
 
-        try:
-            # 3. Initialize Agent State
-            initial_state = {
-                "messages": [HumanMessage(content=f"Starting analysis on {files_paths_str}")],
-                "filename": files_paths_str,      # Clean string "a.py | b.py"
-                "project_root": sandboxed_dir,    # Critical for imports
-                "code_content": full_code_content,
-                "pylint_score": 0.0,
-                "pylint_msg": "",
-                "test_errors": "",
-                "iteration_count": 0,
-                # Pass ALL files in sandbox to context, so the agent knows about files outside the current batch
-                "signatures_map": build_project_context(files), 
-                "test_file": ""
-            }
-
-            # 4. RUN THE AGENT
-            final_state = graph.invoke(initial_state)
-
-            # 5. Reporting
-            final_score = final_state.get("pylint_score", 0)
-            print(f"✅ Finished Batch {files_paths_str}")
-            print(f"   - Final Score: {final_score}/10")
+def run_pipeline(sandboxed_dir: str, workers: int = 4, resume: bool = False, target_dir: str = None) -> dict:
+    """
+    Runs the agents on every python file of an existing sandbox.
+    Returns a small summary (batches, levels, final score per batch).
 
-        except Exception as e:
-            print(f"❌ Failed on batch {files_paths_str}: {e}")
-        
-        print('sleeping for 4 seconds...')
-        sleep(4)    
+    Graph state is checkpointed in the sandbox after every node and finished batches are
+    recorded in its run manifest, so `resume=True` picks an interrupted run up where it stopped.
 
-    print("\n✅ MISSION_COMPLETE")
-    print(f"Output available in: {sandboxed_dir}")
+    With `target_dir`, batches that passed in an earlier run and whose files and dependencies
+    are unchanged since are not processed again (see src/utils/skip_manifest.py).
+    """
+    run = prepare_run(sandboxed_dir, resume=resume, target_dir=target_dir)
+    batches, skipped = run["batches"], run["skipped"]
+    graph, checkpointer = compile_graph(sandboxed_dir)
+
+    # Signatures of the whole project, built ONCE and then updated by the Fixer
+    init_project_context(sandboxed_dir, run["files"])
+
+    # 3. Execution Loop (Wavefront), up to `workers` batches at a time
+    skipped_by_batch = {tuple(batches[i]): score for i, score in skipped.items()}
+    results = run_wavefront(
+        batches,
+        run["batch_dependencies"],
+        lambda batch: skipped_by_batch[tuple(batch)] if tuple(batch) in skipped_by_batch else process_batch(
+            graph, batch, sandboxed_dir, run["dependency_graph"], run["reverse_graph"],
+            manifest=run["manifest"], resume=resume, skip_manifest=run["skip_manifest"]),
+        max_workers=workers
+    )
+    flush_logs()
+    export_traces()
+    checkpointer.conn.close()
+    USAGE.print_report()
+
+    return {
+        "files": len(run["files"]),
+        "batches": len(batches),
+        "levels": [len(level) for level in run["levels"]],
+        "scores": [None if isinstance(results.get(i), Exception) else results.get(i) for i in range(len(batches))],
+        "usage": USAGE.summary(),
+    }
+
+def run_coordinator(sandboxed_dir: str, queue_path: str, resume: bool = False, target_dir: str = None,
+                    poll_interval: float = 5.0) -> dict:
+    """
+    Coordinator mode: plans the run, puts the batches and their dependency edges on the durable
+    queue, then waits while `--worker` processes (here or on hosts sharing the filesystem) drain it.
+    Restarted on the same sandbox (--resume), it keeps the queue and what is already done.
+    """
+    run = prepare_run(sandboxed_dir, resume=resume, target_dir=target_dir)
+    batches = run["batches"]
+    queue = WorkQueue(queue_path)
+    created = queue.enqueue(
+        [[os.path.relpath(f, sandboxed_dir) for f in batch] for batch in batches],
+        run["batch_dependencies"],
+        meta={
+            "sandbox": os.path.abspath(sandboxed_dir),
+            "target_dir": os.path.abspath(run["target_dir"]) if run["target_dir"] else "",
+            "files": [os.path.relpath(f, sandboxed_dir) for f in run["files"]],
+        },
+        finished=run["skipped"],
+    )
+    print(f"📬 Queue {'created' if created else 'already holds this plan'}: {queue_path}")
+    print(f"   Start workers with: python main.py --worker --queue {queue_path}")
+
+    last_counts = None
+    while not queue.is_finished():
+        counts = queue.counts()
+        if counts != last_counts:
+            print(f"⏳ Queue: {counts}")
+            last_counts = counts
+        time.sleep(poll_interval)
+
+    results = queue.results()
+    print(f"📬 Queue finished: {queue.counts()}")
+    export_traces()
+    return {
+        "files": len(run["files"]),
+        "batches": len(batches),
+        "levels": [len(level) for level in run["levels"]],
+        "scores": [results.get(i) if isinstance(results.get(i), (int, float)) else None for i in range(len(batches))],
+    }
+
+def run_queue_worker(queue_path: str, workers: int = 1) -> int:
+    """
+    Worker mode: claims ready batches from the coordinator's queue and runs the agents on them
+    (`workers` batches at a time). A batch whose previous worker died resumes from its last checkpoint.
+    Returns the number of batches processed by this process.
+    """
+    queue = WorkQueue(queue_path)
+    sandboxed_dir = queue.get_meta("sandbox")
+    if sandboxed_dir is None:
+        raise ValueError(f"❌ Queue {queue_path} is empty: start the coordinator first.")
+    target_dir = queue.get_meta("target_dir") or None
+    files = [os.path.join(sandboxed_dir, f) for f in json.loads(queue.get_meta("files"))]
+    print(f"👷 Worker on {sandboxed_dir} ({len(files)} files, {workers} thread(s))")
+
+    dependency_graph = build_dependency_graph(files, project_root=sandboxed_dir)
+    reverse_graph = build_reverse_graph(dependency_graph)
+    graph, checkpointer = compile_graph(sandboxed_dir)
+    skip_manifest = SkipManifest(target_dir, skip_manifest_dir(sandboxed_dir)) if target_dir else None
+
+    # Signatures scanned once; afterwards only the files of batches finished since are re-read
+    refreshed = set(queue.finished_batches())
+    init_project_context(sandboxed_dir, files)
+    refresh_lock = threading.Lock()
+
+    def process(relative_batch, attempt):
+        batch = [os.path.join(sandboxed_dir, f) for f in relative_batch]
+        # Dependencies were rewritten by other workers: reload their signatures
+        with refresh_lock:
+            newly_finished = queue.finished_batches(exclude=refreshed)
+            refreshed.update(newly_finished)
+            refresh_project_context(sandboxed_dir, [os.path.join(sandboxed_dir, f)
+                                                    for batch_files in newly_finished.values() for f in batch_files])
+        return process_batch(graph, batch, sandboxed_dir, dependency_graph, reverse_graph,
+                             resume=attempt > 1, skip_manifest=skip_manifest, raise_errors=True)
+
+    processed = []
+    threads = [threading.Thread(target=lambda: processed.append(run_worker(queue, process)))
+               for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    flush_logs()
+    export_traces()
+    checkpointer.conn.close()
+    USAGE.print_report()
+    return sum(processed)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,8 +1,21 @@
+import functools
 from langgraph.graph import StateGraph, END , START 
 from src.nodes.auditor import auditor_node
+from src.nodes.autofix import autofix_node
 from src.nodes.fixer import fixer_node
 from src.nodes.judge import judge_node
 from src.state.AgentState import AgentState
+from src.utils.tracing import span, trace_context
+
+
+def traced_node(name, node):
+    """One span per node execution, tagged with the iteration the node runs in."""
+    @functools.wraps(node)
+    def wrapper(state):
+        iteration = state.get("iteration_count", 0)
+        with trace_context(iteration=iteration, node=name), span(name, category="node", iteration=iteration):
+            return node(state)
+    return wrapper
 
 def build_agent_graph() -> StateGraph[AgentState]:
     """
@@ -10,20 +23,22 @@ def build_agent_graph() -> StateGraph[AgentState]:
     
     Nodes:
     1. JUDGE: Quality Assurance
-    2. AUDITOR: Code Analysis
-    3. FIXER: Code Refactoring
+    2. AUTOFIX: Deterministic pre-pass (safe pylint rewrites, no LLM)
+    3. AUDITOR: Code Analysis
+    4. FIXER: Code Refactoring
     
     The graph loops between these nodes until the END condition is met.
     """
     graph = StateGraph(AgentState)
     
     # Define nodes
-    graph.add_node("JUDGE", judge_node)
-    graph.add_node("AUDITOR", auditor_node)
-    graph.add_node("FIXER", fixer_node)
+    graph.add_node("JUDGE", traced_node("JUDGE", judge_node))
+    graph.add_node("AUTOFIX", traced_node("AUTOFIX", autofix_node))
+    graph.add_node("AUDITOR", traced_node("AUDITOR", auditor_node))
+    graph.add_node("FIXER", traced_node("FIXER", fixer_node))
     
     # Define edges (workflow)
-    graph.add_edge(START, "AUDITOR")
+    graph.add_edge(START, "AUTOFIX")
     return graph
 
 builder = build_agent_graph()
@@ -1,6 +1,19 @@
+import asyncio
+import atexit
 import os
+import threading
+import time
+import weakref
+import httpx
 from dotenv import load_dotenv , find_dotenv
 from langchain_mistralai import ChatMistralAI
+from langchain_mistralai.chat_models import global_ssl_context  # the TLS settings ChatMistralAI uses by default
+from src.utils.rate_limiter import get_rate_limiter, is_rate_limit_error
+from src.utils.llm_cache import get_llm_cache, is_cache_enabled, make_cache_key, tool_schemas
+from src.models.fake_llm import FakeChatModel
+from src.utils.metrics import timed
+from src.utils.tracing import add_span_attributes
+from src.utils.usage import USAGE
 # from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Load environment variables (looks for GOOGLE_API_KEY in .env)
@@ -29,9 +42,79 @@ load_dotenv(find_dotenv())
 #     )
 
 
+# HTTP connection pool shared by every Mistral model of the process (keep-alive, one TLS handshake per connection)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT = 60
+LLM_TEMPERATURE = 0  # deterministic code generation (also what makes the response cache valid)
+
+# One wrapped model per (backend, model, config) for the whole process
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+_HTTP_CLIENTS = {}
+
+
+class _PerLoopAsyncClient(httpx.AsyncClient):
+    """
+    AsyncClient given to ChatMistralAI: httpx async clients are bound to one event loop,
+    so every request is sent through a client created for the running loop.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)  # builds the requests (base_url, headers); never sends itself
+        self._options = options
+        self._clients = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    def _for_running_loop(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._clients[loop] = httpx.AsyncClient(**self._options)
+            return client
+
+    async def send(self, request, **kwargs):
+        return await self._for_running_loop().send(request, **kwargs)
+
+
+def _get_http_clients(endpoint: str, api_key: str, timeout: float):
+    """
+    Returns the (httpx.Client, async client) pair shared by all the models using this endpoint / key,
+    with the same TLS verification as ChatMistralAI's own clients.
+    httpx.Client is thread safe; the async client opens one connection pool per event loop.
+    Caller must hold _MODELS_LOCK.
+    """
+    key = (endpoint, api_key, timeout)
+    if key not in _HTTP_CLIENTS:
+        options = dict(
+            base_url=endpoint,
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Authorization": f"Bearer {api_key}",
+            },
+            timeout=timeout,
+            verify=global_ssl_context,
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+        )
+        _HTTP_CLIENTS[key] = (httpx.Client(**options), _PerLoopAsyncClient(**options))
+    return _HTTP_CLIENTS[key]
+
+
+@atexit.register
+def close_llm_clients():
+    """Closes the shared sync HTTP clients (the async ones are released with their event loop)."""
+    with _MODELS_LOCK:
+        clients = list(_HTTP_CLIENTS.values())
+        _HTTP_CLIENTS.clear()
+    for client, _ in clients:
+        client.close()
+
+
 def get_llm(model_type="medium"):
     """
-    Returns the Mistral LLM instance.
+    Returns the Mistral LLM instance (or the offline fake model when LLM_BACKEND=fake).
+    The instance is created once per process and shared by all the nodes and threads.
     """
     
     # Map your "flash" or "pro" keywords to specific Mistral models
@@ -45,15 +128,117 @@ def get_llm(model_type="medium"):
         # Most powerful model for complex reasoning
         model_name = "mistral-large-latest"    
 
-    print(f"🔌 Loading LLM: {model_name}")
+    backend = os.getenv("LLM_BACKEND", "mistral")
+    key = (backend, model_name, LLM_TEMPERATURE, LLM_TIMEOUT)
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            print(f"🔌 Loading LLM: {model_name}")
+            _MODELS[key] = _build_llm(backend, model_name)
+        return _MODELS[key]
+
+
+def _build_llm(backend: str, model_name: str):
+    """Caller must hold _MODELS_LOCK."""
+    # Offline backend for load testing (LLM_BACKEND=fake or --llm-backend fake)
+    if backend == "fake":
+        return CachedLLM(RateLimitedLLM(FakeChatModel(model_name), model_name), model_name, backend=backend)
 
+    endpoint = os.getenv("MISTRAL_BASE_URL") or "https://api.mistral.ai/v1"
+    api_key = os.getenv("MISTRAL_API_KEY")
+    client, async_client = _get_http_clients(endpoint, api_key, LLM_TIMEOUT)
     llm = ChatMistralAI(
         model=model_name,
-        temperature=0,
-        mistral_api_key=os.getenv("MISTRAL_API_KEY"),
+        temperature=LLM_TEMPERATURE,
+        mistral_api_key=api_key,
+        endpoint=endpoint,
         max_retries=5,
-        timeout=60
+        timeout=LLM_TIMEOUT,
+        client=client,
+        async_client=async_client
         # Mistral handles context windows automatically, usually 32k or 128k
     )
 
-    return llm
\ No newline at end of file
+    return CachedLLM(RateLimitedLLM(llm, model_name), model_name, backend=backend)
+
+
+# How many times a call is re-sent after a 429 before the error reaches the node
+MAX_RATE_LIMIT_RETRIES = 5
+
+class RateLimitedLLM:
+    """
+    Wraps a chat model so every call goes through the shared per-model rate limiter.
+    Exposes the same invoke() / bind_tools() interface the nodes use.
+    """
+
+    def __init__(self, llm, model_name: str):
+        self.llm = llm
+        self.model_name = model_name
+
+    def bind_tools(self, tools, **kwargs):
+        return RateLimitedLLM(self.llm.bind_tools(tools, **kwargs), self.model_name)
+
+    def invoke(self, messages, **kwargs):
+        limiter = get_rate_limiter(self.model_name)
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            limiter.acquire()
+            try:
+                response = self.llm.invoke(messages, **kwargs)
+            except Exception as e:
+                limited, retry_after = is_rate_limit_error(e)
+                if not limited or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                print(f"⏳ Rate limited on {self.model_name}, slowing down...")
+                limiter.on_rate_limited(retry_after)
+                continue
+            limiter.on_success()
+            return response
+
+
+class CachedLLM:
+    """
+    Wraps a chat model with the on-disk response cache.
+    All calls use temperature=0, so a response for the same model + messages + tools is reusable.
+    Cache hits never reach the rate limiter or the network.
+    bind_tools() results are kept: binding the same tools again returns the same wrapper.
+    """
+
+    def __init__(self, llm, model_name: str, tools=None, backend: str = "mistral"):
+        self.llm = llm
+        self.model_name = model_name
+        self.backend = backend  # part of the cache key: fake and real responses never mix
+        self.tools = tools or []
+        self._bound = {}
+        self._bound_lock = threading.Lock()
+
+    def bind_tools(self, tools, **kwargs):
+        key = (tuple(getattr(t, "name", getattr(t, "__name__", repr(t))) for t in tools), repr(sorted(kwargs.items())))
+        with self._bound_lock:
+            if key not in self._bound:
+                self._bound[key] = CachedLLM(self.llm.bind_tools(tools, **kwargs), self.model_name, tool_schemas(tools),
+                                             backend=self.backend)
+            return self._bound[key]
+
+    @timed("llm")
+    def invoke(self, messages, **kwargs):
+        add_span_attributes(model=self.model_name, prompt_chars=sum(len(str(getattr(m, "content", m))) for m in messages))
+        start = time.perf_counter()
+        if not is_cache_enabled() or kwargs:
+            return self._metered(self.llm.invoke(messages, **kwargs), start, cache_hit=False)
+
+        cache = get_llm_cache()
+        key = make_cache_key(self.model_name, messages, self.tools, backend=self.backend)
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"💾 Cache hit ({self.model_name})")
+            return self._metered(cached, start, cache_hit=True)
+
+        response = self.llm.invoke(messages)
+        cache.put(key, self.model_name, response)
+        return self._metered(response, start, cache_hit=False)
+
+    def _metered(self, response, start: float, cache_hit: bool):
+        """Records the call's tokens and time (src/utils/usage.py) and adds them to the current LLM span."""
+        call = USAGE.record(self.model_name, response, time.perf_counter() - start, cache_hit=cache_hit)
+        add_span_attributes(cache_hit=cache_hit, response_chars=len(str(getattr(response, "content", ""))),
+                            input_tokens=call["input_tokens"], output_tokens=call["output_tokens"])
+        return response
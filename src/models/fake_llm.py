@@ -0,0 +1,128 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+# Simulated behaviour of the offline backend (LLM_BACKEND=fake)
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))              # mean seconds per call
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))    # 0..1, generic API errors
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))  # 0..1, HTTP 429
+FAKE_LLM_TRANSFORM = os.getenv("FAKE_LLM_TRANSFORM", "echo")              # "echo" or "strip"
+
+
+class FakeRateLimitError(Exception):
+    """Looks like an HTTP 429 to is_rate_limit_error()."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests (simulated)")
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+def _split_files(code: str) -> list:
+    """Splits "FILE: a.py\n<code>\nFILE: b.py\n<code>" into [(a.py, code), (b.py, code)]."""
+    files = []
+    for block in re.split(r"^FILE:? (?=\S+\.py\s*$)", code, flags=re.MULTILINE):
+        name, _, content = block.partition("\n")
+        if name.strip().endswith(".py"):
+            files.append((name.strip(), content.strip("\n") + "\n"))
+    return files
+
+
+def _section(prompt: str, start: str, end: str) -> str:
+    match = re.search(re.escape(start) + r"\n(.*?)\n" + re.escape(end), prompt, re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def _transform(content: str) -> str:
+    if FAKE_LLM_TRANSFORM == "strip":
+        return "\n".join(line.rstrip() for line in content.splitlines()) + "\n"
+    return content
+
+
+class FakeChatModel:
+    """
+    Deterministic local stand-in for ChatMistralAI (no network).
+
+    - Fixer prompts       -> one write_file call per file, echoing the source back (or a scripted transform).
+    - Test generation     -> one write_file call per file with an import smoke test.
+    - Auditor / Judge     -> a short plain-text answer.
+
+    Latency and failure/429 rates are drawn from a RNG seeded by the prompt, so runs are reproducible.
+    """
+
+    def __init__(self, model_name: str, tools=None):
+        self.model_name = model_name
+        self.tools = tools or []
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def bind_tools(self, tools, **kwargs):
+        return FakeChatModel(self.model_name, tools)
+
+    def invoke(self, messages, **kwargs):
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha256(f"{self.model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+        # Retries of the same prompt draw new numbers (so a 429 is not repeated forever)
+        with self.lock:
+            attempt = self.attempts.get(digest, 0)
+            self.attempts[digest] = attempt + 1
+        rng = random.Random(f"{digest}:{attempt}")
+
+        if FAKE_LLM_LATENCY > 0:
+            time.sleep(FAKE_LLM_LATENCY * rng.uniform(0.5, 1.5))
+        if rng.random() < FAKE_LLM_RATE_LIMIT_RATE:
+            raise FakeRateLimitError(retry_after=rng.uniform(0.1, 1.0))
+        if rng.random() < FAKE_LLM_FAILURE_RATE:
+            raise RuntimeError("Simulated LLM API failure")
+
+        tool_calls = self._tool_calls(prompt) if self.tools else []
+        content = "" if tool_calls else self._text(prompt)
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            response_metadata={"model_name": self.model_name},
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": (len(content) + sum(len(str(tc["args"])) for tc in tool_calls)) // 4,
+                "total_tokens": (len(prompt) + len(content) + sum(len(str(tc["args"])) for tc in tool_calls)) // 4,
+            },
+        )
+
+    def _tool_calls(self, prompt: str) -> list:
+        if "--- STYLE ISSUES ---" in prompt:
+            code = _section(prompt, "--- SOURCE CODE ---", "--- PROJECT SIGNATURES ---")
+            files = [(name, _transform(content)) for name, content in _split_files(code)]
+        else:
+            match = re.search(r"^FILES \(format[^)]*\): (.+)$", prompt, re.MULTILINE)
+            names = [n.strip() for n in match.group(1).split("|")] if match else []
+            files = []
+            for name in names:
+                folder, base = os.path.split(name)
+                module = name[:-len(".py")].replace("/", ".").replace("\\", ".")
+                test_code = (
+                    "import importlib\n\n\n"
+                    "def test_module_imports():\n"
+                    f"    assert importlib.import_module(\"{module}\") is not None\n"
+                )
+                files.append((os.path.join(folder, f"test_{base}"), test_code))
+
+        return [
+            {
+                "name": "write_file",
+                "args": {"filename": name, "target_dir": ".", "content": content},
+                "id": f"fake_{i}",
+            }
+            for i, (name, content) in enumerate(files)
+        ]
+
+    def _text(self, prompt: str) -> str:
+        if "RAW PYTEST OUTPUT" in prompt:
+            return "- Tests failed: make the modules importable and fix the assertions listed above."
+        return "- Add missing docstrings.\n- Fix naming convention violations.\n- Remove unused imports."
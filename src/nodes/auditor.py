@@ -2,17 +2,23 @@ from pathlib import Path
 from typing import Literal
 from langchain_core.messages import HumanMessage, SystemMessage 
 from langgraph.types import Command 
+from langgraph.graph import END
 from src.state.AgentState import AgentState
 from src.models.AI_models import get_llm
 from src.utils.pylint_tool import run_pylint 
 from src.prompts.auditor_prompts import AUDITOR_SYSTEM_PROMPT, get_auditor_user_prompt
 from src.utils.logger import log_experiment, ActionType
+from src.utils.usage import USAGE, last_call_usage
 
-def auditor_node(state: AgentState) -> Command[Literal["FIXER", "JUDGE"]]:
+# Score pylint a partir duquel le code est considere propre (partage avec l'AutoFix)
+THRESHOLD = 9.25
+
+def auditor_node(state: AgentState) -> Command[Literal["FIXER", "JUDGE", END]]:
     """
     1. Runs Pylint (Static).
     2. Decides whether to invoke the LLM.
     3. Routes to 'FIXER' (if dirty) or 'JUDGE' (if clean).
+       Ends the batch instead of starting a Fixer iteration once the run budget is spent.
     """
     filename = state["filename"]
     target_dir = state["project_root"]
@@ -21,9 +27,9 @@ def auditor_node(state: AgentState) -> Command[Literal["FIXER", "JUDGE"]]:
     file_list = [f"{target_dir}/{f.strip()}" for f in filename.split("|")]
     pylint_result = run_pylint(file_list)
     score = pylint_result["score"]
-    raw_output = pylint_result["stdout"]
-    
-    THRESHOLD = 9.25
+    # Compact per-file / per-symbol aggregate instead of the raw pylint stdout
+    findings_summary = pylint_result["summary"] or pylint_result["stderr"]
+
     # --- SCENARIO A: CODE IS CLEAN ---
     if (score >= THRESHOLD and state["test_errors"] == ""):
         print(f"✅ Code is clean (Score: {score}). Skipping FIXER.")
@@ -34,6 +40,19 @@ def auditor_node(state: AgentState) -> Command[Literal["FIXER", "JUDGE"]]:
             },
             goto="JUDGE"
         )
+
+    # --- BUDGET SPENT (--token-budget / --time-budget): no new Fixer iteration ---
+    budget_reason = USAGE.budget_exceeded()
+    if budget_reason:
+        print(f"🛑 Auditor: {budget_reason}, stopping {filename} at {score}/10.")
+        return Command(
+            update={
+                "pylint_score": score,
+                "messages": [HumanMessage(content=f"Auditor: stopped, {budget_reason}.")]
+            },
+            goto=END
+        )
+
     if (score >= THRESHOLD):
         print(f"⚠️ Score is {score}.")
         return Command(
@@ -48,7 +67,7 @@ def auditor_node(state: AgentState) -> Command[Literal["FIXER", "JUDGE"]]:
     llm = get_llm(model_type="small")
     
     system_msg = AUDITOR_SYSTEM_PROMPT
-    user_msg = get_auditor_user_prompt(Path(filename).name, score, raw_output)
+    user_msg = get_auditor_user_prompt(Path(filename).name, score, findings_summary)
     
     response = llm.invoke([
         SystemMessage(content=system_msg),
@@ -65,7 +84,8 @@ def auditor_node(state: AgentState) -> Command[Literal["FIXER", "JUDGE"]]:
                 "input_prompt": f"SYSTEM:\n{system_msg}\n\nUSER:\n{user_msg}",
                 "output_response": response.content,
                 "pylint_score": score,
-                "filename": filename
+                "filename": filename,
+                "usage": last_call_usage()
             },
             status="SUCCESS"
         )
@@ -0,0 +1,410 @@
+import ast
+import difflib
+import io
+import os
+import re
+import sys
+import tokenize
+from typing import Callable, Dict, List, Literal
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+from src.state.AgentState import AgentState
+from src.nodes.auditor import THRESHOLD
+from src.utils.pylint_tool import run_pylint
+from src.utils.file_tool import write_file
+from src.utils.source_index import SOURCE_INDEX
+from src.utils.logger import log_experiment, ActionType
+
+# Registre des correcteurs deterministes : message id pylint -> fonction(text, findings) -> text
+# Seules des reecritures sures sont enregistrees (pas de renommage : les conventions de nommage
+# touchent les appelants dans d'autres fichiers et restent au Fixer).
+AUTOFIXERS: Dict[str, Callable[[str, List[dict]], str]] = {}
+
+
+def autofix(message_id: str):
+    """Enregistre un correcteur pour un message pylint (ex: @autofix("W0611"))."""
+    def register(func):
+        AUTOFIXERS[message_id] = func
+        return func
+    return register
+
+
+def _string_lines(text: str) -> set:
+    """Lignes qui continuent une chaine multi-ligne : leurs espaces font partie de la valeur."""
+    lines = set()
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(text).readline):
+            if token.type == tokenize.STRING and token.start[0] != token.end[0]:
+                lines.update(range(token.start[0], token.end[0]))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return lines
+
+
+def _module_statements(tree: ast.Module) -> Dict[int, ast.stmt]:
+    """Instructions de niveau module, par numero de ligne de depart."""
+    return {node.lineno: node for node in tree.body}
+
+
+def _owns_lines(lines: List[str], node: ast.stmt) -> bool:
+    """True si `node` est seul sur ses lignes (hors commentaire final) : on peut les reecrire."""
+    first = lines[node.lineno - 1]
+    last = lines[node.end_lineno - 1]
+    before = first[:node.col_offset]
+    after = last[node.end_col_offset:].strip()
+    return before.strip() == "" and (after == "" or after.startswith("#"))
+
+
+@autofix("C0303")
+def fix_trailing_whitespace(text: str, findings: List[dict]) -> str:
+    lines = text.splitlines(keepends=True)
+    protected = _string_lines(text)
+    for finding in findings:
+        number = finding["line"]
+        if 1 <= number <= len(lines) and number not in protected:
+            line = lines[number - 1]
+            ending = line[len(line.rstrip("\r\n")):]
+            lines[number - 1] = line.rstrip("\r\n").rstrip(" \t") + ending
+    return "".join(lines)
+
+
+@autofix("C0304")
+def fix_missing_final_newline(text: str, findings: List[dict]) -> str:
+    return text if text.endswith("\n") else text + "\n"
+
+
+@autofix("C0305")
+def fix_trailing_newlines(text: str, findings: List[dict]) -> str:
+    return text.rstrip("\r\n") + "\n"
+
+
+# "Unused import os", "Unused numpy imported as np", "Unused path imported from os", "Unused x imported from m as y"
+_UNUSED_IMPORT = re.compile(r"^Unused import (?P<name>[\w.]+)$")
+_UNUSED_IMPORT_AS = re.compile(r"^Unused (?P<name>[\w.]+) imported as (?P<asname>\w+)$")
+_UNUSED_FROM = re.compile(r"^Unused (?P<name>[\w.*]+) imported from [\w.]+(?: as (?P<asname>\w+))?$")
+
+
+def _match_unused(message: str):
+    return _UNUSED_IMPORT.match(message) or _UNUSED_IMPORT_AS.match(message) or _UNUSED_FROM.match(message)
+
+
+def _bound_name(match) -> str:
+    """Nom cree dans le module par l'import (`import a.b` -> a, `import a as b` -> b)."""
+    if match.groupdict().get("asname"):
+        return match["asname"]
+    return match["name"] if "imported from" in match.string else match["name"].split(".")[0]
+
+
+@autofix("W0611")
+def fix_unused_imports(text: str, findings: List[dict]) -> str:
+    tree = ast.parse(text)
+    statements = _module_statements(tree)
+    lines = text.splitlines(keepends=True)
+
+    # aliases a retirer, par instruction d'import
+    to_remove: Dict[int, set] = {}
+    for finding in findings:
+        match = _match_unused(finding["message"])
+        node = statements.get(finding["line"])
+        if match is None or not isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue  # import dans un bloc (try/if/fonction) : laisse au Fixer
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            continue
+        to_remove.setdefault(node.lineno, set()).add((match["name"], match.groupdict().get("asname")))
+
+    # de bas en haut pour garder les numeros de ligne valides
+    for lineno in sorted(to_remove, reverse=True):
+        node = statements[lineno]
+        if not _owns_lines(lines, node):
+            continue
+        kept = [alias for alias in node.names if (alias.name, alias.asname) not in to_remove[lineno]]
+        if len(kept) == len(node.names):
+            continue
+        if kept:
+            if node.lineno != node.end_lineno:
+                continue  # import multi-ligne partiellement utilise : on ne reformate pas
+            comment = lines[node.lineno - 1][node.end_col_offset:].rstrip("\r\n")
+            node.names = kept
+            replacement = [ast.unparse(node) + comment + "\n"]
+        else:
+            replacement = []
+        lines[node.lineno - 1:node.end_lineno] = replacement
+    return "".join(lines)
+
+
+@autofix("C0410")
+def fix_multiple_imports(text: str, findings: List[dict]) -> str:
+    tree = ast.parse(text)
+    statements = _module_statements(tree)
+    lines = text.splitlines(keepends=True)
+    for number in sorted({f["line"] for f in findings}, reverse=True):
+        node = statements.get(number)
+        if not isinstance(node, ast.Import) or node.lineno != node.end_lineno or not _owns_lines(lines, node):
+            continue
+        comment = lines[number - 1][node.end_col_offset:].rstrip("\r\n")
+        split = [ast.unparse(ast.Import(names=[alias])) for alias in node.names]
+        split[0] += comment
+        lines[number - 1:number] = [line + "\n" for line in split]
+    return "".join(lines)
+
+
+def _local_roots(file_path: str) -> set:
+    """Modules / packages de premier niveau du projet : ce qui est a cote du package racine du fichier."""
+    root = os.path.dirname(os.path.abspath(file_path))
+    while os.path.isfile(os.path.join(root, "__init__.py")):
+        root = os.path.dirname(root)
+    try:
+        entries = os.listdir(root)
+    except OSError:
+        return set()
+    return {name[:-3] if name.endswith(".py") else name for name in entries}
+
+
+def _import_group(node: ast.stmt, local_roots: set):
+    """0 __future__, 1 bibliotheque standard, 2 tierce partie, 3 projet ; None si l'instruction melange."""
+    if isinstance(node, ast.ImportFrom):
+        if node.module == "__future__":
+            return 0
+        if node.level:
+            return 3
+        tops = {(node.module or "").split(".")[0]}
+    else:
+        tops = {alias.name.split(".")[0] for alias in node.names}
+    groups = {1 if top in sys.stdlib_module_names else 3 if top in local_roots else 2 for top in tops}
+    return groups.pop() if len(groups) == 1 else None
+
+
+@autofix("C0411")
+def fix_import_order(text: str, findings: List[dict]) -> str:
+    """
+    Reordonne un bloc d'imports de niveau module (standard, tierce partie, projet), ordre relatif conserve.
+    Seuls les blocs contigus sans commentaire entre les imports sont touches : rien ne change de portee.
+    """
+    tree = ast.parse(text)
+    lines = text.splitlines(keepends=True)
+    reported = {f["line"] for f in findings}
+    local_roots = _local_roots(findings[0]["path"])
+
+    blocks, current = [], []
+    for node in tree.body:
+        is_import = isinstance(node, (ast.Import, ast.ImportFrom))
+        if is_import and current and all(not l.strip() for l in lines[current[-1].end_lineno:node.lineno - 1]):
+            current.append(node)
+            continue
+        if current:
+            blocks.append(current)
+        current = [node] if is_import else []
+    if current:
+        blocks.append(current)
+
+    for block in reversed(blocks):
+        if not reported & {n.lineno for n in block} or not all(_owns_lines(lines, n) for n in block):
+            continue
+        groups = [_import_group(n, local_roots) for n in block]
+        if None in groups:
+            continue
+        ordered = sorted(zip(groups, range(len(block)), block), key=lambda item: (item[0], item[1]))
+        replacement, previous_group = [], None
+        for group, _, node in ordered:
+            if previous_group is not None and group != previous_group:
+                replacement.append("\n")
+            replacement.extend(lines[node.lineno - 1:node.end_lineno])
+            previous_group = group
+        if not replacement[-1].endswith("\n"):
+            replacement[-1] += "\n"
+        lines[block[0].lineno - 1:block[-1].end_lineno] = replacement
+    return "".join(lines)
+
+
+@autofix("C0121")
+def fix_singleton_comparison(text: str, findings: List[dict]) -> str:
+    """`x == None` -> `x is None` (les comparaisons a True/False changent la semantique : ignorees)."""
+    tree = ast.parse(text)
+    reported = {f["line"] for f in findings}
+    lines = text.splitlines(keepends=True)
+    edits = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Compare) or node.lineno not in reported or len(node.ops) != 1:
+            continue
+        comparator = node.comparators[0]
+        op = {ast.Eq: " is ", ast.NotEq: " is not "}.get(type(node.ops[0]))
+        if op is None or not (isinstance(comparator, ast.Constant) and comparator.value is None):
+            continue
+        if node.left.end_lineno != comparator.lineno:
+            continue
+        edits.append((comparator.lineno, node.left.end_col_offset, comparator.col_offset, op))
+
+    # de droite a gauche sur chaque ligne ; les offsets ast sont en octets utf-8
+    for number, start, end, op in sorted(edits, reverse=True):
+        raw = lines[number - 1].encode("utf-8")
+        if raw[start:end].strip() not in (b"==", b"!="):
+            continue
+        lines[number - 1] = (raw[:start] + op.encode("utf-8") + raw[end:]).decode("utf-8")
+    return "".join(lines)
+
+
+@autofix("W0107")
+def fix_unnecessary_pass(text: str, findings: List[dict]) -> str:
+    tree = ast.parse(text)
+    reported = {f["line"] for f in findings}
+    lines = text.splitlines(keepends=True)
+    removable = []
+    for node in ast.walk(tree):
+        for field in ("body", "orelse", "finalbody"):
+            body = getattr(node, field, None)
+            if not isinstance(body, list) or len(body) < 2:
+                continue
+            for stmt in body:
+                if isinstance(stmt, ast.Pass) and stmt.lineno in reported and _owns_lines(lines, stmt):
+                    removable.append(stmt.lineno)
+                    break  # un seul par bloc : le bloc ne peut pas devenir vide
+    for number in sorted(set(removable), reverse=True):
+        del lines[number - 1]
+    return "".join(lines)
+
+
+def _names_used_by(dependents: List[str]):
+    """
+    Noms qu'un module peut exporter vers les fichiers qui l'importent : noms importes par
+    `from ... import nom` et attributs lus (`module.nom`) dans ces fichiers. Volontairement large.
+    None si un dependant fait `from ... import *` (tout peut etre utilise).
+    """
+    names = set()
+    for path in dependents:
+        tree = SOURCE_INDEX.get(path).tree
+        if tree is None:
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom):
+                if any(alias.name == "*" for alias in node.names):
+                    return None
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.Attribute):
+                names.add(node.attr)
+    return names
+
+
+def _drop_reexports(findings: List[dict], relative_name: str, target_dir: str, dependents: List[str]) -> List[dict]:
+    """
+    Retire les W0611 qu'il ne faut pas corriger : un import "inutilise" d'un __init__.py ou d'un module
+    importe ailleurs dans le projet peut etre une re-exportation utilisee par ces fichiers.
+    """
+    unused = [f for f in findings if f["message_id"] == "W0611"]
+    if not unused:
+        return findings
+    if os.path.basename(relative_name) == "__init__.py":
+        return [f for f in findings if f["message_id"] != "W0611"]
+    used = _names_used_by([os.path.join(target_dir, d) for d in dependents])
+    kept = []
+    for finding in findings:
+        match = _match_unused(finding["message"]) if finding["message_id"] == "W0611" else None
+        if match is not None and (used is None or _bound_name(match) in used):
+            continue
+        kept.append(finding)
+    return kept
+
+
+def _remap_findings(old: str, new: str, findings: List[dict]) -> List[dict]:
+    """Reporte les numeros de ligne des findings sur le nouveau texte ; ceux des lignes modifiees sont perdus."""
+    mapping = {}
+    matcher = difflib.SequenceMatcher(None, old.splitlines(), new.splitlines(), autojunk=False)
+    for block in matcher.get_matching_blocks():
+        for offset in range(block.size):
+            mapping[block.a + offset + 1] = block.b + offset + 1
+    return [dict(f, line=mapping[f["line"]]) for f in findings if f["line"] in mapping]
+
+
+def apply_autofixes(text: str, findings: List[dict]) -> tuple:
+    """
+    Applique les correcteurs enregistres, un message id a la fois.
+    Une etape dont le resultat ne se re-parse pas est annulee.
+
+    Returns:
+        (nouveau texte, liste des message ids appliques)
+    """
+    applied = []
+    for message_id, fixer in AUTOFIXERS.items():
+        selected = [f for f in findings if f["message_id"] == message_id]
+        if not selected:
+            continue
+        try:
+            fixed = fixer(text, selected)
+            ast.parse(fixed)
+        except (SyntaxError, ValueError):
+            continue
+        if fixed != text:
+            findings = _remap_findings(text, fixed, [f for f in findings if f["message_id"] != message_id])
+            text = fixed
+            applied.append(message_id)
+    return text, applied
+
+
+def autofix_node(state: AgentState) -> Command[Literal["AUDITOR", "JUDGE"]]:
+    """
+    Pre-pass deterministe avant l'Auditor :
+    1. Runs Pylint and applies the registered safe rewrites (no LLM).
+    2. Re-scores the batch.
+    3. Routes to 'JUDGE' if the score now clears THRESHOLD (Auditor and Fixer LLM calls skipped),
+       to 'AUDITOR' otherwise.
+    """
+    filename = state["filename"]
+    target_dir = state["project_root"]
+    relative_names = [f.strip() for f in filename.split("|")]
+    file_list = [f"{target_dir}/{f}" for f in relative_names]
+
+    pylint_result = run_pylint(file_list)
+    findings = [f for f in pylint_result["findings"] if f["message_id"] in AUTOFIXERS]
+    if not findings:
+        return Command(goto="AUDITOR")
+
+    print(f"🔧 AutoFix: {len(findings)} mechanical issue(s) in {filename}...")
+    applied = {}
+    for relative_name, file_path in zip(relative_names, file_list):
+        file_findings = [f for f in findings if os.path.abspath(f["path"]) == os.path.abspath(file_path)]
+        file_findings = _drop_reexports(file_findings, relative_name, target_dir,
+                                        state.get("dependents", {}).get(relative_name, []))
+        if not file_findings:
+            continue
+        text = SOURCE_INDEX.text(file_path)
+        fixed, fixed_ids = apply_autofixes(text, file_findings)
+        if fixed != text:
+            write_file.invoke({"filename": relative_name, "target_dir": target_dir, "content": fixed})
+            applied[relative_name] = fixed_ids
+
+    if not applied:
+        return Command(goto="AUDITOR")
+
+    score = run_pylint(file_list)["score"]
+    print(f"🔧 AutoFix: score {pylint_result['score']} -> {score} ({applied})")
+
+    try:
+        log_experiment(
+            agent_name="AutoFix",
+            model_used="none",
+            action=ActionType.FIX,
+            details={
+                "input_prompt": pylint_result["summary"],
+                "output_response": str(applied),
+                "pylint_score_before": pylint_result["score"],
+                "pylint_score": score,
+                "filename": filename
+            },
+            status="SUCCESS"
+        )
+    except Exception as e:
+        print(f"⚠️ Logging failed in AutoFix: {e}")
+
+    # le contenu envoye aux agents suit le disque
+    code_content = ""
+    for relative_name, file_path in zip(relative_names, file_list):
+        code_content += f"FILE: {relative_name}\n" + SOURCE_INDEX.text(file_path) + "\n\n"
+
+    update = {
+        "pylint_score": score,
+        "code_content": code_content,
+        "messages": [HumanMessage(content=f"AutoFix: applied {applied}, score {score}/10.")]
+    }
+    if score >= THRESHOLD and state["test_errors"] == "":
+        print(f"✅ Code is clean after AutoFix (Score: {score}). Skipping AUDITOR and FIXER.")
+        return Command(update=update, goto="JUDGE")
+    return Command(update=update, goto="AUDITOR")
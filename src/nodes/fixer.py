@@ -1,4 +1,5 @@
 from pathlib import Path
+import hashlib
 import re
 from typing import Literal
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -7,13 +8,12 @@ from src.state.AgentState import AgentState
 from src.models.AI_models import get_llm
 from src.utils.file_tool import write_file
 from src.prompts.fixer_prompts import FIXER_SYSTEM_PROMPT, get_fixer_user_prompt
-from src.utils.context import get_single_file_signature
+from src.utils.context import get_single_file_signature, update_project_signature, select_context
 from src.utils.logger import log_experiment, ActionType
+from src.utils.usage import last_call_usage
 import os
-from time import sleep
 
 def fixer_node(state: AgentState) -> Command[Literal["JUDGE"]]:
-    sleep(4)  # To avoid rate limits
     filename = state["filename"]
     current_code = state["code_content"]
     style_issues = state.get("style_issues", "No style issues reported.")
@@ -24,13 +24,16 @@ def fixer_node(state: AgentState) -> Command[Literal["JUDGE"]]:
     llm_no_tools = get_llm(model_type="large") 
     llm = llm_no_tools.bind_tools([write_file])
     
+    # Only the signatures of related files (dependencies / dependents), within the token budget
+    context_blocks, context_report = select_context(state["signatures_map"], state.get("context_ranking", []))
+
     system_msg = FIXER_SYSTEM_PROMPT
     user_msg = get_fixer_user_prompt(
         filename,
         style_issues,
         test_errors,
         current_code,
-        context=state["signatures_map"].values(),
+        context=context_blocks,
         test_file=state["test_file"] if "test_file" in state else None)
     
     response = llm.invoke([
@@ -53,7 +56,9 @@ def fixer_node(state: AgentState) -> Command[Literal["JUDGE"]]:
                 "output_response": response.content if hasattr(response, 'content') else str(response),
                 "tool_calls": tool_calls_info,
                 "filename": filename,
-                "style_issues": style_issues[:200] if style_issues else "None"
+                "style_issues": style_issues[:200] if style_issues else "None",
+                "context_report": context_report,
+                "usage": last_call_usage()
             },
             status="SUCCESS"
         )
@@ -74,15 +79,23 @@ def fixer_node(state: AgentState) -> Command[Literal["JUDGE"]]:
                    "content": content
                })
             new_code += "FILE " + file_name + "\n" + content + "\n"  # Update new_code with the content written
-            current_map[file_name] = get_single_file_signature(file_name, content)
-    
-    # 🔄 2. Update the Dictionary (The Fast Part)
-    # We grab the current map from state
-    
-    # We update ONLY the key for this file
+
+            # 🔄 Update the signatures (The Fast Part)
+            # We update ONLY the key for this file, in the batch state AND in the
+            # project-wide map so that the next batches see the new signatures
+            relative_name = os.path.normpath(file_name)
+            signature = get_single_file_signature(
+                relative_name, content, path=os.path.join(state['project_root'], relative_name))
+            current_map[relative_name] = signature
+            update_project_signature(state['project_root'], relative_name, signature)
+
+    # Same bytes as the previous Fixer pass: the Judge stops the loop (see src/utils/convergence.py)
+    output_hash = hashlib.sha256(new_code.encode("utf-8")).hexdigest()
 
     return Command(
         update={
+            "fixer_output_hash": output_hash,
+            "fixer_repeated": output_hash == state.get("fixer_output_hash"),
             "signatures_map": current_map,
             "test_errors": "",
             "style_issues": "",
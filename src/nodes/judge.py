@@ -10,7 +10,9 @@ from src.utils.pylint_tool import run_pylint
 from src.utils.pytest_tool import run_pytest
 from src.utils.file_tool import write_file
 from src.utils.logger import log_experiment, ActionType
-from time import sleep
+from src.utils.usage import USAGE, last_call_usage
+from src.utils.convergence import convergence_reason, error_fingerprint
+from src.utils.context import select_context
 from pathlib import Path
 from src.prompts.judge_prompts import (
     GEN_TEST_SYSTEM_PROMPT, get_gen_test_user_prompt,
@@ -24,8 +26,10 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
     2. RUN TESTS: Executes pytest.
     3. ANALYZE (If Fail): Uses LLM to summarize exactly what went wrong.
     4. DECIDE: Pass -> End | Fail -> AUDITOR.
+       A failing batch also ends early when the loop has converged: no fewer failing tests,
+       no new error and no better pylint score over CONVERGENCE_PATIENCE iterations, or a
+       Fixer output identical to the previous one.
     """
-    sleep(4)  # To avoid rate limits
     filename = state["filename"]
     code_content = state["code_content"]
     target_dir = state["project_root"]
@@ -46,7 +50,8 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
         llm = llm_no_tools.bind_tools([write_file])
         
         gen_system_msg = GEN_TEST_SYSTEM_PROMPT
-        gen_user_msg = get_gen_test_user_prompt(base_name, code_content, signatures_map=state["signatures_map"].values())
+        context_blocks, context_report = select_context(state["signatures_map"], state.get("context_ranking", []))
+        gen_user_msg = get_gen_test_user_prompt(base_name, code_content, signatures_map=context_blocks)
         
         gen_response = llm.invoke([
             SystemMessage(content=gen_system_msg),
@@ -68,7 +73,9 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
                     "output_response": gen_response.content if hasattr(gen_response, 'content') else str(gen_response),
                     "tool_calls": gen_tool_calls_info,
                     "filename": base_name,
-                    "action_type": "test_generation"
+                    "action_type": "test_generation",
+                    "context_report": context_report,
+                    "usage": last_call_usage()
                 },
                 status="SUCCESS"
             )
@@ -109,9 +116,11 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
         result = run_pytest(test_files, project_root=state['project_root'])
         passed = result["test_passed"]
         raw_output = result["stdout"] + result["stderr"]
+        failed_tests = result.get("failed_tests", [])
     except Exception as e:
         passed = False
         raw_output = f"CRITICAL SYSTEM ERROR: {str(e)}"
+        failed_tests = []
 
     # --- PHASE 3: DECISION ---
     
@@ -129,6 +138,33 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
                                },
                        goto=END)
 
+    # Convergence: failing tests, error fingerprint and score of this iteration vs the previous ones
+    score = run_pylint(raw_files)["score"]
+    history = state.get("convergence_history", []) + [{
+        "iteration": iteration,
+        "failed_tests": failed_tests,
+        "fingerprint": error_fingerprint(failed_tests, raw_output),
+        "score": score,
+    }]
+    stop_reason = convergence_reason(history, state.get("fixer_repeated", False))
+    if stop_reason:
+        print(f"🛑 Judge: Converged, {stop_reason}.")
+        return Command(update={"pylint_score": score,
+                               "convergence_history": history,
+                               "messages": [HumanMessage(content=f"Judge: Stopped, {stop_reason}.")]
+                               },
+                       goto=END)
+
+    # Run budget spent (--token-budget / --time-budget): no feedback, no new Fixer iteration
+    budget_reason = USAGE.budget_exceeded()
+    if budget_reason:
+        print(f"🛑 Judge: {budget_reason}.")
+        return Command(update={"pylint_score": score,
+                               "convergence_history": history,
+                               "messages": [HumanMessage(content=f"Judge: Stopped, {budget_reason}.")]
+                               },
+                       goto=END)
+
     # --- PHASE 4: FORMALIZE FEEDBACK ---
     print("❌ Judge: Tests Failed. Formalizing feedback...")
     llm = get_llm(model_type="small")
@@ -152,7 +188,10 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
                 "output_response": analysis.content,
                 "filename": base_name,
                 "action_type": "feedback_formalization",
-                "iteration": iteration
+                "iteration": iteration,
+                "failed_tests": failed_tests,
+                "fingerprint": history[-1]["fingerprint"],
+                "usage": last_call_usage()
             },
             status="SUCCESS"
         )
@@ -164,6 +203,7 @@ def judge_node(state: AgentState) -> Command[Literal["AUDITOR", END]]:
             "test_file": test_content,
             "test_errors": analysis.content,
             "iteration_count": iteration + 1,
+            "convergence_history": history,
             "messages": [HumanMessage(content=f"Judge: Tests failed.")]
         },
         goto="AUDITOR"
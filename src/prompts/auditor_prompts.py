@@ -1,18 +1,22 @@
+from src.prompts.budget import compress_pylint_output, fit_to_budget, get_token_budget
+
 AUDITOR_SYSTEM_PROMPT = """You are a Senior Code Auditor specialized in empirical software engineering. 
 Your goal is to perform ActionType.ANALYSIS. You must produce a precise, actionable refactoring plan 
 that identifies style violations, lack of documentation, and potential bugs based on static analysis 
 (Pylint). Focus on making the code 'clean' as per research standards."""
 
-def get_auditor_user_prompt(filename, score, raw_output):
+def get_auditor_user_prompt(filename, score, raw_output, model_name="mistral-small-latest"):
+    # Raw pylint lines are collapsed (an aggregated summary passes through), then cut to the model budget
+    raw_output = fit_to_budget(compress_pylint_output(raw_output), get_token_budget(model_name))
     return f"""
 FILES TO ANALYZE (format : ./Path/FILE1 | ./Path/FILE2 | ...): {filename}
 CURRENT PYLINT SCORE: {score}/10
 
-RAW PYLINT OUTPUT:
+PYLINT FINDINGS (per file, per symbol):
 {raw_output}
 
 TASK:
-1. Analyze the raw Pylint noise.
+1. Analyze the Pylint findings.
 2. Produce a concise, bulleted refactoring plan for the Fixer Agent.
 3. Explicitly list missing docstrings, naming convention violations, or complexity issues.
 4. Do not provide code, only the diagnostic plan.
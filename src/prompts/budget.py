@@ -0,0 +1,166 @@
+import os
+import re
+from collections import OrderedDict
+
+# Token budget for tool output (pylint / pytest / feedback) inside ONE prompt, per model
+MODEL_TOKEN_BUDGETS = {
+    "mistral-small-latest": int(os.getenv("PROMPT_BUDGET_SMALL", "6000")),
+    "mistral-medium-latest": int(os.getenv("PROMPT_BUDGET_MEDIUM", "10000")),
+    "mistral-large-latest": int(os.getenv("PROMPT_BUDGET_LARGE", "12000")),
+}
+DEFAULT_TOKEN_BUDGET = 6000
+
+try:  # optional: exact counts when tiktoken is installed, ~4 chars/token otherwise
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def get_token_budget(model_name: str) -> int:
+    return MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+
+
+def fit_to_budget(text: str, token_budget: int) -> str:
+    """Keeps the head and the tail of `text` (line based) so that it fits in `token_budget` tokens."""
+    if count_tokens(text) <= token_budget:
+        return text
+
+    lines = text.splitlines()
+    head, tail = [], []
+    used = 0
+    # alternate head / tail: the start holds the context, the end holds the summary
+    i, j = 0, len(lines) - 1
+    while i <= j:
+        line = lines[i] if len(head) <= len(tail) else lines[j]
+        cost = count_tokens(line) + 1
+        if used + cost > token_budget - 20:
+            break
+        if len(head) <= len(tail):
+            head.append(line)
+            i += 1
+        else:
+            tail.append(line)
+            j -= 1
+        used += cost
+
+    if not head and not tail:
+        return _cut_characters(text, token_budget)
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [f"... [{omitted} lines truncated to fit the token budget] ..."] + tail[::-1])
+
+
+def _cut_characters(text: str, token_budget: int) -> str:
+    """No whole line fits (one huge line): keeps the first and last characters instead."""
+    keep = max(0, token_budget - 20) * 4
+    while True:
+        head, tail = text[:keep // 2], text[len(text) - (keep - keep // 2):]
+        omitted = len(text) - len(head) - len(tail)
+        result = f"{head}\n... [{omitted} characters truncated to fit the token budget] ...\n{tail}"
+        if keep == 0 or count_tokens(result) <= token_budget:
+            return result
+        keep = keep * 3 // 4
+
+
+# path:line:col: C0116: Missing function or method docstring (missing-function-docstring)
+_PYLINT_LINE = re.compile(r"^(?P<path>.+?):(?P<line>\d+):(?P<col>\d+): (?P<id>[CRWEFI]\d{4}): (?P<msg>.*)$")
+
+
+def compress_pylint_output(raw_output: str) -> str:
+    """
+    Collapses duplicate pylint messages: one line per (file, message id, message)
+    with the number of occurrences and the first line numbers.
+    """
+    groups = OrderedDict()
+    other_lines = []
+    for line in raw_output.splitlines():
+        match = _PYLINT_LINE.match(line.strip())
+        if not match:
+            if line.strip() and not line.startswith("*****"):
+                other_lines.append(line)
+            continue
+        key = (match["path"], match["id"], match["msg"])
+        groups.setdefault(key, []).append(match["line"])
+
+    result = []
+    for (path, msg_id, msg), line_numbers in groups.items():
+        if len(line_numbers) == 1:
+            result.append(f"{path}:{line_numbers[0]}: {msg_id}: {msg}")
+        else:
+            shown = ", ".join(line_numbers[:8]) + (", ..." if len(line_numbers) > 8 else "")
+            result.append(f"{path}: {msg_id}: {msg} x{len(line_numbers)} (lines {shown})")
+    return "\n".join(result + other_lines)
+
+
+_SECTION_HEADER = re.compile(r"^_{3,} (?P<name>\S.*?) _{3,}$")
+_FRAME_SEPARATOR = re.compile(r"^(_ )+_?\s*$")
+_BANNER = re.compile(r"^={3,} ?(?P<title>.*?) ?={3,}$")
+
+
+def _compress_failure(lines: list) -> list:
+    """Keeps the first frame (the test) and the last frame (where it raised) of one failure."""
+    frames, current = [], []
+    for line in lines:
+        if _FRAME_SEPARATOR.match(line):
+            frames.append(current)
+            current = []
+        else:
+            current.append(line)
+    frames.append(current)
+    frames = [f for f in frames if any(l.strip() for l in f)]
+
+    if len(frames) <= 2:
+        return [l for f in frames for l in f]
+    omitted = len(frames) - 2
+    return frames[0] + [f"... [{omitted} intermediate frames omitted] ..."] + frames[-1]
+
+
+def compress_pytest_output(raw_output: str) -> str:
+    """
+    Trims a `pytest -v` output:
+    - drops PASSED lines,
+    - keeps the first and last frames of each failure,
+    - replaces a failure identical to an earlier one (same error, same place) by a one-line reference.
+    """
+    out = []
+    seen_errors = {}
+    section_name, section_lines = None, []
+
+    def flush_section():
+        if section_name is None:
+            return
+        kept = _compress_failure(section_lines)
+        error_lines = [l.strip() for l in kept if l.lstrip().startswith("E ")]
+        locations = [l.strip() for l in kept if re.match(r"^\S+\.py:\d+: ", l)]
+        fingerprint = (tuple(error_lines), locations[-1] if locations else "")
+        if error_lines and fingerprint in seen_errors:
+            out.append(f"__ {section_name} __: same failure as {seen_errors[fingerprint]}")
+            return
+        seen_errors[fingerprint] = section_name
+        out.append(f"__ {section_name} __")
+        out.extend(kept)
+
+    for line in raw_output.splitlines():
+        header = _SECTION_HEADER.match(line)
+        banner = _BANNER.match(line)
+        if header or banner:
+            flush_section()
+            section_name, section_lines = (header["name"], []) if header else (None, [])
+            if banner:
+                out.append(line)
+            continue
+        if section_name is not None:
+            section_lines.append(line)
+        elif " PASSED" not in line:
+            out.append(line)
+    flush_section()
+
+    return "\n".join(out)
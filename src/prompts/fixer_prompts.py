@@ -1,7 +1,13 @@
+from src.prompts.budget import fit_to_budget, get_token_budget
+
 FIXER_SYSTEM_PROMPT = """You are a Senior Python Refactoring Agent.
 Your goal is ActionType.FIX. You rewrite code to fix logic failures and improve quality. Only write python code and don't include any explanations."""
 
-def get_fixer_user_prompt(filename, style_issues, test_errors, current_code,context, test_file=""):
+def get_fixer_user_prompt(filename, style_issues, test_errors, current_code,context, test_file="", model_name="mistral-large-latest"):
+    # The source code is never cut; the feedback sections share a quarter of the model budget each
+    feedback_budget = get_token_budget(model_name) // 4
+    style_issues = fit_to_budget(style_issues, feedback_budget) if style_issues else style_issues
+    test_errors = fit_to_budget(test_errors, feedback_budget) if test_errors else test_errors
     return f"""
 FILES (format : ./Path/FILE1 | ./Path/FILE2 | ...): {filename}
 
@@ -1,7 +1,11 @@
+from src.prompts.budget import compress_pytest_output, fit_to_budget, get_token_budget
+
 # Use Case 1: Test Generation
 GEN_TEST_SYSTEM_PROMPT = "You are a QA Engineer specialized in Pytest (ActionType.GENERATION). Your task is to write comprehensive unit tests for the provided Python code to ensure full coverage and correctness."
 
-def get_gen_test_user_prompt(base_name, code_content , signatures_map=None):
+def get_gen_test_user_prompt(base_name, code_content , signatures_map=None, model_name="mistral-large-latest"):
+    # The source code is never cut (the tests must see all of it); only the signatures are budgeted
+    signatures = fit_to_budget("".join(signatures_map) if signatures_map else "", get_token_budget(model_name) // 4)
     return f"""
 Write a Pytest test file for this code:
 
@@ -21,12 +25,14 @@ INSTRUCTIONS:
 9.When patching classes in tests, always patch the location where the class is imported, not where it is defined.
 10.When mocking a class that gets instantiated (e.g., db = Database()), ensure the test verifies the call to the mock class itself, or properly tracks the .return_value which represents the instance.
 11.only Use the following methods and attributes that exist in the provided code. Do not invent new methods or attributes.:
-{"".join(signatures_map) if signatures_map else ""}
+{signatures}
 """
 # Use Case 2: Formalizing Feedback
 FORMALIZE_SYSTEM_PROMPT = "You are a Senior Debugger, Your mission is ActionType.DEBUG and validation. You must be strict: 100% test pass rate is required. If tests fail, explain exactly what broke to help the Fixer in the Self-Healing loop."
 
-def get_formalize_user_prompt(base_name, raw_output): 
+def get_formalize_user_prompt(base_name, raw_output, model_name="mistral-small-latest"): 
+    # PASSED lines, intermediate frames and repeated failures are dropped, then the output is cut to the model budget
+    raw_output = fit_to_budget(compress_pytest_output(raw_output), get_token_budget(model_name))
     return f"""
 The unit tests failed for these files '{base_name}'.
 
@@ -26,7 +26,13 @@ class AgentState(TypedDict):
 
     # --- SAFETY ---
     iteration_count: int # Tracks how many times we've looped (to stop infinite loops)
+    # One entry per failed Judge run: {iteration, failed_tests, fingerprint, score} (convergence detection)
+    convergence_history: List[dict]
+    fixer_output_hash: str   # sha256 of the last Fixer output
+    fixer_repeated: bool     # True if the last Fixer output is byte-identical to the one before
     
     signatures_map: Dict[str, str]
+    context_ranking: List[str]  # Files related to the batch (relative paths), most relevant first
+    dependents: Dict[str, List[str]]  # Batch file -> project files importing it (relative paths)
     
     test_file: str  # e.g., "sandbox/test_bad_code.py" or None if not generated
\ No newline at end of file
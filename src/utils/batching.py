@@ -1,125 +1,351 @@
 import ast
 import re
 import os
+import sys
+from src.utils.source_index import SOURCE_INDEX
 
 def get_imports_robust(file_path):
     """
     Extracts imported modules from a file.
+
+    Returns a set of (level, module, names) tuples:
+    - import a.b            -> (0, "a.b", ())
+    - from a import b, c    -> (0, "a", ("b", "c"))   ('b' may be a submodule)
+    - from ..pkg import mod -> (2, "pkg", ("mod",))
+    - from . import mod     -> (1, "", ("mod",))
     
     Strategy:
     1. Try parsing with AST (Abstract Syntax Tree). This is accurate and ignores 
        imports inside comments or strings.
     2. If AST fails (due to SyntaxError in the broken file), fall back to Regex.
+
+    The file is read and parsed through the shared SOURCE_INDEX, so the result is
+    reused until the file changes.
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    return SOURCE_INDEX.derived(file_path, "imports", _extract_imports)
 
+def _extract_imports(entry):
+    content = entry.text
+    file_path = entry.path
     imports = set()
 
     # --- STRATEGY 1: AST (The Precise Way) ---
-    try:
-        tree = ast.parse(content)
-        
+    tree = entry.tree
+    if tree is not None:
         for node in ast.walk(tree):
-            # Case A: import os, sys
+            # Case A: import os, pkg.sub
             if isinstance(node, ast.Import):
                 for alias in node.names:
-                    # 'alias.name' could be 'os.path'. We only want 'os'.
-                    root_module = alias.name.split('.')[0]
-                    imports.add(root_module)
+                    imports.add((0, alias.name, ()))
             
-            # Case B: from inventory import check_stock
+            # Case B: from inventory import check_stock / from . import helper
             elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    # 'node.module' is 'inventory'
-                    root_module = node.module.split('.')[0]
-                    imports.add(root_module)
+                names = tuple(alias.name for alias in node.names if alias.name != "*")
+                imports.add((node.level, node.module or "", names))
 
         # If we successfully parsed the AST, we are done. Return immediately.
         return imports
 
-    except SyntaxError:
-        print(f"⚠️ Syntax Error detected in {file_path}. AST failed. Switching to Regex fallback.")
-    except Exception as e:
-        print(f"⚠️ Unexpected error parsing {file_path}: {e}. Switching to Regex fallback.")
+    print(f"⚠️ Syntax Error detected in {file_path}. AST failed. Switching to Regex fallback.")
 
     # --- STRATEGY 2: REGEX (The "Dirty" Fallback) ---
     # We only reach here if AST crashed. This is less accurate (might catch comments)
     # but guarantees we still get a dependency graph even if the code is broken.
     
-    # Matches: from (inventory) import ...
-    imports.update(re.findall(r'^\s*from\s+(\w+)', content, re.MULTILINE))
+    # Matches: from (..pkg.inventory) import (a, b)
+    for dots, module, names in re.findall(r'^\s*from\s+(\.*)([\w.]*)\s+import\s+\(?([\w\s,]+)', content, re.MULTILINE):
+        imports.add((len(dots), module, tuple(re.findall(r'\w+', names))))
     
-    # Matches: import (os)
+    # Matches: import (pkg.os)
     # This also catches "import os, sys" but only captures the first one cleanly in simple regex.
-    # For a robust fallback, we iterate common patterns.
-    imports.update(re.findall(r'^\s*import\s+(\w+)', content, re.MULTILINE))
+    for module in re.findall(r'^\s*import\s+([\w.]+)', content, re.MULTILINE):
+        imports.add((0, module, ()))
 
     return imports
 
-def build_sequential_batches(files):
-    # 1. Build the Dependency Map with FULL PATHS
-    # dependency_map = { "./path/to/order.py": {'inventory'} }
-    dependency_map = {f: get_imports_robust(f) for f in files}
-    
-    # 2. Build a "Lookup Bridge" to fix the Path Mismatch
-    # Maps "product.py" -> "./sandbox/.../product.py"
-    filename_to_fullpath = {os.path.basename(f): f for f in files}
-    
-    batches = []
-    
-    while dependency_map:
-        # 1. Find Ready Files
-        ready_files = []
-        for f, deps in dependency_map.items():
-            # Check if any dependency 'd' corresponds to a file in our remaining list
-            # We use the BRIDGE to convert 'product' -> 'product.py' -> full path
-            has_dependency = False
+class ModuleIndex:
+    """
+    Maps fully qualified module names to project files, built once per run.
+
+    "pkg/utils.py" -> "pkg.utils", "pkg/__init__.py" -> "pkg".
+    Two files with the same basename in different packages no longer collide.
+    """
+
+    def __init__(self, files, project_root):
+        self.project_root = project_root
+        self.modules = {}      # "pkg.utils" -> "/sandbox/pkg/utils.py"
+        self.module_of = {}    # "/sandbox/pkg/utils.py" -> "pkg.utils"
+        self.suffixes = {}     # "utils" / "pkg.utils" -> {"pkg.utils", ...}
+
+        for f in files:
+            name = self._module_name(f)
+            if name is None:
+                continue
+            self.modules[name] = f
+            self.module_of[f] = name
+
+            parts = name.split(".")
+            for i in range(1, len(parts)):
+                self.suffixes.setdefault(".".join(parts[i:]), set()).add(name)
+
+    def _module_name(self, file_path):
+        relative = os.path.relpath(file_path, self.project_root)
+        if relative.startswith(".."):
+            return None
+        parts = relative[:-len(".py")].split(os.sep)
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(parts) if parts else None
+
+    def _package_of(self, file_path):
+        """Package that relative imports of this file are resolved against."""
+        name = self.module_of.get(file_path, "")
+        if os.path.basename(file_path) == "__init__.py":
+            return name
+        return name.rpartition(".")[0]
+
+    def resolve(self, importer, level, name):
+        """
+        Returns the project file for an import seen in 'importer', or None
+        for stdlib / third party modules.
+        """
+        # 1. Relative imports: from . import x / from ..pkg import y
+        if level:
+            package = self._package_of(importer)
+            package = package.split(".") if package else []
+            if level - 1 > len(package):
+                return None
+            base = package[:len(package) - (level - 1)]
+            full_name = ".".join(base + ([name] if name else []))
+            return self.modules.get(full_name)
+
+        if not name:
+            return None
+
+        # 2. Absolute import rooted at the project root
+        if name in self.modules:
+            return self.modules[name]
+
+        # 3. Script-style import of a module living next to the importer
+        package = self._package_of(importer)
+        if package and f"{package}.{name}" in self.modules:
+            return self.modules[f"{package}.{name}"]
+
+        # 4. Project rooted deeper than the sandbox (e.g. src/ layout): accept a unique suffix match
+        # (never for stdlib names, a local "json.py" must not capture every "import json")
+        if name.split(".")[0] in sys.stdlib_module_names:
+            return None
+        candidates = self.suffixes.get(name, ())
+        if len(candidates) == 1:
+            return self.modules[next(iter(candidates))]
+
+        return None
+
+def build_dependency_graph(files, project_root=None):
+    """
+    Maps every project file to the set of project files it imports (FULL PATHS).
+    Imports that do not belong to the project (stdlib, third party) are dropped.
+
+    Example: { "./sandbox/order.py": {"./sandbox/inventory.py"} }
+    """
+    if not files:
+        return {}
+    if project_root is None:
+        project_root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+
+    module_index = ModuleIndex(files, project_root)
+
+    dependency_graph = {}
+    for f in files:
+        deps = set()
+        for level, module, names in get_imports_robust(f):
+            if not names:
+                targets = [module_index.resolve(f, level, module)]
+            else:
+                # "from pkg import mod" depends on pkg/mod.py when it exists, otherwise on pkg itself
+                targets = [
+                    module_index.resolve(f, level, f"{module}.{name}" if module else name)
+                    or module_index.resolve(f, level, module)
+                    for name in names
+                ]
+            deps.update(t for t in targets if t and t != f)
+        dependency_graph[f] = deps
+
+    return dependency_graph
+
+def find_strongly_connected_components(dependency_graph):
+    """
+    Tarjan's algorithm (iterative, O(V+E)).
+
+    Returns the strongly connected components as sorted lists of files.
+    Components are emitted dependencies-first: a component only comes after
+    every component it imports from.
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in sorted(dependency_graph):
+        if root in index_of:
+            continue
+
+        # Each frame: (node, iterator over its dependencies)
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(sorted(dependency_graph[root])))]
+
+        while work:
+            node, deps = work[-1]
+            pushed = False
             for d in deps:
-                dep_filename = d + ".py"
-                
-                # If this dependency exists in our project AND is still in the map
-                if dep_filename in filename_to_fullpath:
-                    full_dep_path = filename_to_fullpath[dep_filename]
-                    if full_dep_path in dependency_map:
-                        has_dependency = True
+                if d not in dependency_graph:
+                    continue
+                if d not in index_of:
+                    index_of[d] = lowlink[d] = counter
+                    counter += 1
+                    stack.append(d)
+                    on_stack.add(d)
+                    work.append((d, iter(sorted(dependency_graph[d]))))
+                    pushed = True
+                    break
+                if d in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[d])
+            if pushed:
+                continue
+
+            # All dependencies of 'node' explored
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
                         break
-            
-            if not has_dependency:
-                ready_files.append(f)
-        
-        if ready_files:
-            # Sort to ensure consistent behavior
-            ready_files.sort()
-            
-            # OPTION A: Clean Files Found -> Pick ONE (Sequential Mode)
-            next_file = ready_files[0]
-            batches.append([next_file])
-            del dependency_map[next_file]
-            continue 
-
-        # 2. OPTION B: No Ready Files -> Cycle Detected
-        start_node = next(iter(dependency_map)) 
-        cycle_batch = set()
-        stack = [start_node]
-        
-        while stack:
-            current = stack.pop()
-            if current in cycle_batch: continue
-            cycle_batch.add(current)
-            
-            for d in dependency_map[current]:
-                dep_filename = d + ".py"
-                if dep_filename in filename_to_fullpath:
-                    full_dep_path = filename_to_fullpath[dep_filename]
-                    if full_dep_path in dependency_map:
-                        cycle_batch.add(full_dep_path)
-                        stack.append(full_dep_path)
-        
-        batches.append(list(cycle_batch))
-        
-        for f in cycle_batch:
-            if f in dependency_map:
-                del dependency_map[f]
-
-    return batches
\ No newline at end of file
+                components.append(sorted(component))
+
+    return components
+
+def build_layered_batches(files, dependency_graph=None):
+    """
+    Groups files into batches (one batch = one strongly connected component,
+    i.e. a single file or an exact import cycle) and layers them by level.
+
+    Level 0 holds batches with no project dependency, level N holds batches whose
+    deepest dependency is at level N-1. Batches of the same level are independent
+    and safe to run in parallel.
+
+    Returns:
+        List of levels, each level being a sorted list of batches (lists of files).
+    """
+    if dependency_graph is None:
+        dependency_graph = build_dependency_graph(files)
+
+    components = find_strongly_connected_components(dependency_graph)
+    component_of = {f: i for i, component in enumerate(components) for f in component}
+
+    # Components come dependencies-first, so every dependency level is already known
+    levels_of = []
+    for i, component in enumerate(components):
+        level = 0
+        for f in component:
+            for d in dependency_graph[f]:
+                j = component_of.get(d)
+                if j is not None and j != i:
+                    level = max(level, levels_of[j] + 1)
+        levels_of.append(level)
+
+    levels = [[] for _ in range(max(levels_of, default=-1) + 1)]
+    for component, level in zip(components, levels_of):
+        levels[level].append(component)
+
+    return [sorted(level) for level in levels]
+
+def build_sequential_batches(files, dependency_graph=None):
+    """
+    Flattens the layered batches (level 0 first) into a single ordered list.
+    Every batch comes after all the batches it depends on.
+    """
+    return [batch for level in build_layered_batches(files, dependency_graph) for batch in level]
+
+def get_batch_dependencies(batches, dependency_graph):
+    """
+    For every batch, returns the set of batch indexes it must wait for.
+
+    A batch depends on an earlier batch when one of its files imports a file of
+    that batch. Edges only point backwards, so the result is always a DAG.
+    """
+    file_to_batch = {f: i for i, batch in enumerate(batches) for f in batch}
+
+    batch_dependencies = []
+    for i, batch in enumerate(batches):
+        deps = set()
+        for f in batch:
+            for d in dependency_graph.get(f, ()):
+                j = file_to_batch.get(d)
+                if j is not None and j < i:
+                    deps.add(j)
+        batch_dependencies.append(deps)
+
+    return batch_dependencies
+
+def rank_related_files(batch, dependency_graph, reverse_graph=None):
+    """
+    Orders the files related to a batch by relevance, using the import graph.
+
+    Distance 1 = direct dependencies and direct dependents, distance 2 = their own
+    neighbours, etc. At the same distance, dependencies come before dependents.
+    Files of the batch itself and files not connected to it are left out.
+
+    Returns:
+        List of (file, distance) tuples, most relevant first.
+    """
+    if reverse_graph is None:
+        reverse_graph = build_reverse_graph(dependency_graph)
+
+    seen = set(batch)
+    ranked = []
+    frontier = list(batch)
+    distance = 0
+    while frontier:
+        distance += 1
+        dependencies = sorted({d for f in frontier for d in dependency_graph.get(f, ()) if d not in seen})
+        seen.update(dependencies)
+        dependents = sorted({d for f in frontier for d in reverse_graph.get(f, ()) if d not in seen})
+        seen.update(dependents)
+        ranked.extend((f, distance) for f in dependencies + dependents)
+        frontier = dependencies + dependents
+
+    return ranked
+
+def get_transitive_dependencies(files, dependency_graph):
+    """Every file `files` depends on, directly or not (the files themselves excluded)."""
+    seen = set(files)
+    stack = list(files)
+    dependencies = set()
+    while stack:
+        for d in dependency_graph.get(stack.pop(), ()):
+            if d not in seen:
+                seen.add(d)
+                dependencies.add(d)
+                stack.append(d)
+    return dependencies
+
+def build_reverse_graph(dependency_graph):
+    """{ file: files importing it } (the dependents of each file)."""
+    reverse_graph = {f: set() for f in dependency_graph}
+    for f, deps in dependency_graph.items():
+        for d in deps:
+            reverse_graph.setdefault(d, set()).add(f)
+    return reverse_graph
+
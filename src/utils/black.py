@@ -1,8 +1,146 @@
-import subprocess
+# Formatage Black en memoire (API de black), sur tous les fichiers a la fois, avec un cache par contenu
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from src.utils.metrics import timed
+from src.utils.sandbox import write_text_atomic
+from src.utils.source_index import SOURCE_INDEX
+from src.utils.tracing import add_span_attributes
 
-def run_black(file_path):
-    """Runs black formatter to fix style issues automatically."""
+BLACK_WORKERS = int(os.getenv("BLACK_WORKERS", str(os.cpu_count() or 1)))
+# en dessous, demarrer des processus coute plus cher que de formater sur place
+BLACK_PARALLEL_MIN_FILES = 16
+BLACK_CACHE_PATH = os.getenv("BLACK_CACHE_PATH", os.path.join(".cache", "black_cache.json"))
+
+_CACHE_LOCK = threading.Lock()
+
+
+def _get_mode(project_root: str):
+    """Mode black du projet ([tool.black] de son pyproject.toml), comme le ferait la ligne de commande."""
+    import black
+
+    config = {}
+    pyproject = os.path.join(project_root, "pyproject.toml") if project_root else None
+    if pyproject and os.path.isfile(pyproject):
+        try:
+            config = black.parse_pyproject_toml(pyproject)
+        except Exception as e:
+            print(f"⚠️ Black: configuration ignorée ({pyproject}) : {e}")
+    return black.Mode(
+        line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+        string_normalization=not config.get("skip_string_normalization", False),
+        magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+        preview=config.get("preview", False),
+    )
+
+
+def _format_source(args) -> tuple:
+    """
+    Execute dans un worker : formate un contenu.
+    Returns: (texte formate ou None si deja formate, erreur ou None)
+    """
+    import black
+
+    source, mode = args
+    try:
+        return black.format_file_contents(source, fast=False, mode=mode), None
+    except black.NothingChanged:
+        return None, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _load_cache(cache_key: str) -> set:
+    try:
+        with open(BLACK_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    # autre version de black ou autre configuration : le cache ne vaut plus rien
+    return set(data.get("formatted", [])) if data.get("key") == cache_key else set()
+
+
+def _save_cache(cache_key: str, formatted: set):
+    os.makedirs(os.path.dirname(BLACK_CACHE_PATH) or ".", exist_ok=True)
+    write_text_atomic(BLACK_CACHE_PATH, json.dumps({"key": cache_key, "formatted": sorted(formatted)}))
+
+
+@timed("black")
+def run_black_batch(file_list: List[str], project_root: str = None) -> Dict:
+    """
+    Formats every file with black, in-process (several processes when there are many files).
+
+    Contents already known to be black-formatted (by hash, for this black version and mode)
+    are skipped. Files are rewritten atomically and the shared source index is updated.
+
+    Returns:
+        Dict with keys: formatted, unchanged, cached (counts) and failed ({path: error})
+    """
+    report = {"formatted": 0, "unchanged": 0, "cached": 0, "failed": {}}
     try:
-        subprocess.run(["black", file_path], check=True, capture_output=True)
-    except Exception:
-        pass # If black fails, just proceed
\ No newline at end of file
+        import black
+    except ImportError:
+        print("⚠️ Black n'est pas installé : formatage ignoré.")
+        report["failed"] = {path: "black is not installed" for path in file_list}
+        return report
+
+    mode = _get_mode(project_root)
+    cache_key = f"{black.__version__}|{mode!r}"
+    with _CACHE_LOCK:
+        known = _load_cache(cache_key)
+
+    pending = []
+    for path in file_list:
+        try:
+            source = SOURCE_INDEX.text(path)
+        except (OSError, UnicodeDecodeError) as e:
+            report["failed"][path] = f"{type(e).__name__}: {e}"
+            continue
+        if _hash(source) in known:
+            report["cached"] += 1
+        else:
+            pending.append((path, source))
+
+    jobs = [(source, mode) for _, source in pending]
+    results = None
+    if len(pending) >= BLACK_PARALLEL_MIN_FILES and BLACK_WORKERS > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=BLACK_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(_format_source, jobs, chunksize=max(1, len(jobs) // (BLACK_WORKERS * 4))))
+        except Exception as e:
+            print(f"⚠️ Black: pool de processus indisponible ({e}), formatage séquentiel.")
+    if results is None:
+        results = [_format_source(job) for job in jobs]
+
+    for (path, source), (formatted, error) in zip(pending, results):
+        if error is not None:
+            report["failed"][path] = error
+            print(f"⚠️ Black failed on {path}: {error}")
+            continue
+        if formatted is None:
+            report["unchanged"] += 1
+            known.add(_hash(source))
+            continue
+        write_text_atomic(path, formatted)
+        SOURCE_INDEX.update(path, formatted)
+        report["formatted"] += 1
+        known.add(_hash(formatted))
+
+    with _CACHE_LOCK:
+        _save_cache(cache_key, known)
+    add_span_attributes(files=len(file_list), formatted=report["formatted"], unchanged=report["unchanged"],
+                        cached=report["cached"], failed=len(report["failed"]))
+    return report
+
+
+def run_black(file_path, project_root=None):
+    """Runs black formatter to fix style issues automatically."""
+    return run_black_batch([file_path], project_root)
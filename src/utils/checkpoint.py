@@ -0,0 +1,79 @@
+# Reprise des longs runs : etat LangGraph dans SQLite + manifeste des batches termines (dans le sandbox)
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+from src.utils.sandbox import write_text_atomic
+
+CHECKPOINT_DB_NAME = ".swarm_checkpoints.sqlite"
+RUN_MANIFEST_NAME = ".swarm_run.json"
+
+
+def get_checkpointer(sandboxed_dir: str):
+    """
+    SqliteSaver partage par tous les batches du run (les agents tournent dans des threads :
+    la connexion est ouverte avec check_same_thread=False, SqliteSaver serialise les acces).
+    Plusieurs processus (mode --worker) ecrivent dans la meme base : WAL (les lecteurs ne bloquent
+    pas l'ecrivain) et attente jusqu'a 60 s au lieu des 5 s par defaut quand elle est verrouillee.
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    conn = sqlite3.connect(os.path.join(sandboxed_dir, CHECKPOINT_DB_NAME), timeout=60, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA busy_timeout = 60000")
+    return SqliteSaver(conn)
+
+
+def batch_thread_id(batch_relative_paths: List[str]) -> str:
+    """Identifiant stable d'un batch (meme fichiers -> meme thread LangGraph d'un run a l'autre)."""
+    key = "|".join(sorted(os.path.normpath(p) for p in batch_relative_paths))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+class RunManifest:
+    """Batches termines du run, relu par --resume pour ne pas les refaire."""
+
+    def __init__(self, sandboxed_dir: str):
+        self.path = os.path.join(sandboxed_dir, RUN_MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.batches = {}
+        self.files: List[str] = []  # fichiers du projet au depart du run (sans les tests generes ensuite)
+        self.target_dir: Optional[str] = None
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.batches = data.get("batches", {})
+                self.files = data.get("files", [])
+                self.target_dir = data.get("target_dir")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Manifeste de run illisible ({self.path}) : {e}")
+
+    def start(self, files: List[str], target_dir: Optional[str] = None):
+        """Nouveau run (pas une reprise) : oublie les batches d'un run precedent."""
+        with self.lock:
+            self.files = list(files)
+            self.target_dir = os.path.abspath(target_dir) if target_dir else None
+            self.batches = {}
+            self._save()
+
+    def is_done(self, thread_id: str) -> bool:
+        with self.lock:
+            return self.batches.get(thread_id, {}).get("status") == "done"
+
+    def get_score(self, thread_id: str) -> Optional[float]:
+        with self.lock:
+            return self.batches.get(thread_id, {}).get("score")
+
+    def mark_done(self, thread_id: str, files: List[str], score):
+        with self.lock:
+            self.batches[thread_id] = {"files": files, "status": "done", "score": score}
+            # ecrit a chaque batch : un crash ne perd que le batch en cours
+            self._save()
+
+    def _save(self):
+        """Caller must hold self.lock."""
+        write_text_atomic(self.path, json.dumps(
+            {"target_dir": self.target_dir, "files": self.files, "batches": self.batches}, indent=2))
@@ -1,14 +1,19 @@
 # src/utils/context.py
 import ast
 import os
+import threading
 from typing import Dict
+from src.utils.metrics import timed
+from src.utils.source_index import SOURCE_INDEX
+from src.prompts.budget import count_tokens
 
-def get_file_signatures(code_content: str) -> str:
-    """Extracts signatures, including __init__ attributes."""
-    try:
-        tree = ast.parse(code_content)
-    except SyntaxError:
-        return "Error parsing."
+def get_file_signatures(code_content: str, tree: ast.AST = None) -> str:
+    """Extracts signatures, including __init__ attributes. Pass `tree` to reuse an existing parse."""
+    if tree is None:
+        try:
+            tree = ast.parse(code_content)
+        except SyntaxError:
+            return "Error parsing."
     
     signatures = []
     
@@ -63,26 +68,110 @@ def get_file_signatures(code_content: str) -> str:
 
     return "\n".join(signatures)
 
-def get_single_file_signature(filename:str ,content: str) -> str:
-    """Reads file from disk and returns formatted string."""
+def get_indexed_signatures(path: str) -> str:
+    """Signatures of a file through the shared SOURCE_INDEX (parsed once per file version)."""
+    return SOURCE_INDEX.derived(
+        path, "signatures",
+        lambda entry: get_file_signatures(entry.text, entry.tree) if entry.tree is not None else "Error parsing."
+    )
+
+def get_single_file_signature(filename:str ,content: str, path: str = None) -> str:
+    """
+    Returns the formatted signature block of a file ("File: <filename>" + signatures).
+    When `path` is given (file already written to disk), the shared index is used instead of re-parsing `content`.
+    """
     try:
-        sigs = get_file_signatures(content)
-        return f"File: {os.path.basename(filename)}\n{sigs}\n{'-'*30}"
+        sigs = get_indexed_signatures(path) if path else get_file_signatures(content)
+        return f"File: {filename}\n{sigs}\n{'-'*30}\n"
     except Exception:
         return ""
     
-def build_project_context(file_paths: list) -> Dict[str, str]:
-    """Scans all files and builds a dictionary with filenames as keys and signatures as values."""
+@timed("context")
+def build_project_context(file_paths: list, project_root: str = None) -> Dict[str, str]:
+    """
+    Scans all files and builds a dictionary with filenames as keys and signature blocks as values.
+    Keys are paths relative to `project_root` when given (e.g. "pkg/utils.py"), basenames otherwise.
+    """
     context_dict = {}
     
     for path in file_paths:
-        filename = os.path.basename(path)
+        filename = os.path.relpath(path, project_root) if project_root else os.path.basename(path)
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-            sigs = get_file_signatures(content)
-            context_dict[filename] = sigs
+            context_dict[filename] = get_single_file_signature(filename, None, path=path)
         except Exception:
             pass
             
-    return context_dict    
\ No newline at end of file
+    return context_dict
+
+# --- PROJECT-WIDE SIGNATURES (built once per run, updated by the Fixer) ---
+# project_root -> { "pkg/utils.py": "File: pkg/utils.py\n..." }
+_PROJECT_SIGNATURES: Dict[str, Dict[str, str]] = {}
+_PROJECT_SIGNATURES_LOCK = threading.Lock()
+
+def init_project_context(project_root: str, file_paths: list) -> Dict[str, str]:
+    """Builds the signatures of every file of the project once, at startup."""
+    signatures = build_project_context(file_paths, project_root)
+    with _PROJECT_SIGNATURES_LOCK:
+        _PROJECT_SIGNATURES[os.path.abspath(project_root)] = signatures
+    return dict(signatures)
+
+def get_project_context(project_root: str) -> Dict[str, str]:
+    """Snapshot of the current project signatures (includes every update made by earlier batches)."""
+    with _PROJECT_SIGNATURES_LOCK:
+        return dict(_PROJECT_SIGNATURES.get(os.path.abspath(project_root), {}))
+
+def refresh_project_context(project_root: str, file_paths: list):
+    """Recomputes the signatures of these files only (rewritten elsewhere, e.g. by another worker)."""
+    for path in file_paths:
+        filename = os.path.relpath(path, project_root)
+        update_project_signature(project_root, filename, get_single_file_signature(filename, None, path=path))
+
+def update_project_signature(project_root: str, filename: str, signature: str):
+    """Records the new signature of a file the Fixer just wrote, for the batches that follow."""
+    with _PROJECT_SIGNATURES_LOCK:
+        _PROJECT_SIGNATURES.setdefault(os.path.abspath(project_root), {})[filename] = signature
+
+# --- CONTEXT SELECTION FOR PROMPTS ---
+# Maximum (estimated) tokens of signatures sent to the Fixer / test generator
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+def select_context(signatures_map: Dict[str, str], ranking: list, token_budget: int = None):
+    """
+    Picks the signature blocks to put in a prompt, most relevant first, within a token budget.
+
+    Args:
+        signatures_map: { "pkg/utils.py": "File: pkg/utils.py\n..." }
+        ranking: Relative paths ordered by relevance (see batching.rank_related_files).
+        token_budget: Stop adding blocks once this budget would be exceeded (default CONTEXT_TOKEN_BUDGET).
+
+    Returns:
+        (blocks, report) where report = {"included", "dropped", "unrelated", "tokens"}
+    """
+    if token_budget is None:
+        token_budget = CONTEXT_TOKEN_BUDGET
+
+    blocks, included, dropped = [], [], []
+    tokens = 0
+    for filename in ranking:
+        block = signatures_map.get(filename)
+        if block is None:
+            continue
+        cost = count_tokens(block)
+        if dropped or tokens + cost > token_budget:
+            dropped.append(filename)
+            continue
+        blocks.append(block)
+        included.append(filename)
+        tokens += cost
+
+    report = {
+        "included": included,
+        "dropped": dropped,
+        "unrelated": len(set(signatures_map) - set(ranking)),
+        "tokens": tokens,
+    }
+    if dropped:
+        print(f"📉 Context budget ({token_budget} tokens): kept {len(included)} related files, "
+              f"dropped {len(dropped)}: {dropped}")
+    return blocks, report
+
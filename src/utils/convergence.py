@@ -0,0 +1,71 @@
+# Convergence detection for the Judge -> Auditor -> Fixer loop: a batch that stops making progress
+# (same failing tests, same error, same score) is stopped instead of running to the iteration limit.
+import hashlib
+import os
+import re
+from typing import List, Optional
+
+# Iterations without improvement before the batch is stopped
+CONVERGENCE_PATIENCE = int(os.getenv("CONVERGENCE_PATIENCE", "3"))
+# Smallest pylint score change that counts as an improvement
+SCORE_EPSILON = 0.01
+
+# What changes between runs while the error stays the same: addresses, durations, process ids
+_NOISE = [
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile(r"\b\d+(\.\d+)?s\b"), "?s"),
+    (re.compile(r"pid \d+"), "pid ?"),
+]
+
+
+def _normalize(line: str) -> str:
+    for pattern, replacement in _NOISE:
+        line = pattern.sub(replacement, line)
+    return line.strip()
+
+
+def error_fingerprint(failed_tests: List[str], output: str) -> str:
+    """
+    Fingerprint of a failure: failing tests + pytest error lines ("E   ...").
+    Without any "E" line (collection error, crash), the last lines of the output.
+    """
+    lines = output.splitlines()
+    error_lines = [_normalize(l) for l in lines if l.startswith("E ")]
+    if not error_lines:
+        error_lines = [_normalize(l) for l in lines if l.strip()][-20:]
+    key = "\n".join(sorted(failed_tests)) + "\n--\n" + "\n".join(error_lines)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def iterations_without_improvement(history: List[dict]) -> int:
+    """
+    Iterations since the last improvement: fewer failing tests, or a better pylint score,
+    than anything seen before. A new error fingerprint counts as progress when it does not
+    come with more failures (the Fixer at least changed the problem).
+    """
+    stale = 0
+    best_failures, best_score, seen = None, None, set()
+    for entry in history:
+        failures, score = len(entry["failed_tests"]), entry["score"]
+        improved = (
+            best_failures is None
+            or failures < best_failures
+            or score > best_score + SCORE_EPSILON
+            or (entry["fingerprint"] not in seen and failures <= best_failures)
+        )
+        stale = 0 if improved else stale + 1
+        best_failures = failures if best_failures is None else min(best_failures, failures)
+        best_score = score if best_score is None else max(best_score, score)
+        seen.add(entry["fingerprint"])
+    return stale
+
+
+def convergence_reason(history: List[dict], fixer_repeated: bool,
+                       patience: int = CONVERGENCE_PATIENCE) -> Optional[str]:
+    """Why the batch should stop, or None to keep going."""
+    if fixer_repeated:
+        return "the Fixer produced the same code as in the previous iteration"
+    stale = iterations_without_improvement(history)
+    if stale >= patience:
+        return f"no improvement in {stale} iterations"
+    return None
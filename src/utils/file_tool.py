@@ -1,7 +1,9 @@
 #ce fichier doit permettre aux agents de : lire des fichiers, ecrire des fichiers sans sortir de sandbox/ ou target_dir
 import os #indispensable pour sandbox
-from time import sleep
 from langchain_core.tools import tool
+from src.utils.source_index import SOURCE_INDEX
+from src.utils.sandbox import write_text_atomic
+from src.utils.tracing import add_span_attributes, span
 
 def is_path_allowed(file_path: str, target_dir: str) -> bool:
     """
@@ -39,7 +41,6 @@ def read_file(filename: str, target_dir: str) -> str:
         PermissionError: If the file is not inside target_dir.
         FileNotFoundError: If the file does not exist.
     """
-    sleep(2)
     full_path = os.path.join(target_dir, filename)
 
     if not is_path_allowed(full_path, target_dir):
@@ -48,9 +49,11 @@ def read_file(filename: str, target_dir: str) -> str:
     if not os.path.exists(full_path):
         raise FileNotFoundError(f"Fichier introuvable : {full_path}")
 
-    # ouvrir un fichier, lire son contenu, fermer lorsqu'on termine 
-    with open(full_path, "r", encoding = "utf-8") as f:
-        return f.read() #lire et renvoi tout le contenu du fichier 
+    # lecture via l'index partagé : le fichier n'est relu que s'il a changé sur le disque
+    with span("read_file", category="io", file=filename):
+        content = SOURCE_INDEX.text(full_path)
+        add_span_attributes(chars=len(content))
+    return content
     
 
 @tool
@@ -69,7 +72,6 @@ def write_file(filename: str, target_dir: str, content: str) -> int:
     Raises:
         PermissionError: If the file is not inside target_dir.
     """
-    sleep(2)  
     full_path = os.path.join(target_dir, filename)
 
     if not is_path_allowed(full_path, target_dir):
@@ -78,7 +80,11 @@ def write_file(filename: str, target_dir: str, content: str) -> int:
     # si le fichier n'existe pas, on le crée 
     os.makedirs(os.path.dirname(full_path), exist_ok = True)
 
-    #ouvrir un fichier, ecrire sur le fichier, fermer lorsqu'on termine 
-    with open(full_path, "w", encoding = "utf-8") as f:
-        return f.write(content) 
+    # fichier temporaire + remplacement : ne modifie jamais l'original d'un fichier hardlinke
+    with span("write_file", category="io", file=filename, bytes=len(content.encode("utf-8"))):
+        written = write_text_atomic(full_path, content)
+
+    # l'index partagé reçoit directement le nouveau contenu (pas de relecture ni de re-parsing)
+    SOURCE_INDEX.update(full_path, content)
+    return written 
 
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Location and limits of the on-disk LLM response cache
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "500"))
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+# Bypass: LLM_CACHE_DISABLED=1 (or --no-cache in main.py)
+_ENABLED = os.getenv("LLM_CACHE_DISABLED", "0") != "1"
+
+# Size-based eviction is only checked every N writes
+_EVICTION_EVERY = 50
+
+
+def set_cache_enabled(enabled: bool):
+    """Turns the cache on/off for the whole process."""
+    global _ENABLED
+    _ENABLED = enabled
+
+
+def is_cache_enabled() -> bool:
+    return _ENABLED
+
+
+def tool_schemas(tools) -> list:
+    """JSON schemas of bound tools, so a cached tool-call response is tied to the exact tool definitions."""
+    return [convert_to_openai_tool(t) for t in tools]
+
+
+def make_cache_key(model_name: str, messages, tools: Optional[list] = None, backend: str = "mistral") -> str:
+    """
+    sha256 of the backend, the model name, the full message list and the bound tool schemas.
+    The backend keeps offline (fake) responses from ever being served to a real run.
+    """
+    payload = {
+        "backend": backend,
+        "model": model_name,
+        "messages": messages_to_dict(messages),
+        "tools": tools or [],
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite store: cache key -> serialized response message.
+    Responses (including tool_calls) are stored with messages_to_dict and round-trip exactly.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_mb: float = LLM_CACHE_MAX_MB,
+                 max_age_days: float = LLM_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age = max_age_days * 24 * 3600
+        self.lock = threading.Lock()
+        self.writes = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER,"
+                " created_at REAL, last_used REAL)"
+            )
+        self.evict()
+
+    def get(self, key: str):
+        with self.lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.max_age and time.time() - row[1] > self.max_age:
+                with self.conn:
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return messages_from_dict(json.loads(row[0]))[0]
+
+    def put(self, key: str, model_name: str, response):
+        raw = json.dumps(messages_to_dict([response]), ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model_name, raw, len(raw), now, now)
+                )
+            self.writes += 1
+            check_size = self.writes % _EVICTION_EVERY == 0
+        if check_size:
+            self.evict()
+
+    def evict(self):
+        """Drops expired entries, then least recently used ones until the store fits in max_mb."""
+        with self.lock, self.conn:
+            if self.max_age:
+                self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            freed = 0
+            victims = []
+            for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                if total - freed <= self.max_bytes:
+                    break
+                victims.append((key,))
+                freed += size
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+
+_CACHE: Optional[LLMCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide cache instance (opened lazily)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LLMCache()
+        return _CACHE
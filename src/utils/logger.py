@@ -1,11 +1,30 @@
+import atexit
+import glob
+import gzip
 import json
 import os
+import queue
+import shutil
+import threading
+import time
 import uuid
 from datetime import datetime
 from enum import Enum
+from src.utils.metrics import timed
+from src.utils.sandbox import file_lock
 
-# Chemin du fichier de logs
-LOG_FILE = os.path.join("logs", "experiment_data.json")
+# Chemin du fichier de logs (JSON Lines : une entrée JSON par ligne, ajout en fin de fichier)
+LOG_FILE = os.path.join("logs", "experiment_data.jsonl")
+
+# Ancien format (un seul tableau JSON réécrit à chaque appel), voir convert_legacy_log()
+LEGACY_LOG_FILE = os.path.join("logs", "experiment_data.json")
+
+# Rotation : au-delà de cette taille, le fichier courant est archivé (optionnellement en .gz)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(100 * 1024 * 1024)))
+LOG_COMPRESS = os.getenv("LOG_COMPRESS", "0") == "1"
+
+# Délai maximal (secondes) avant qu'une entrée en mémoire soit écrite sur disque
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
 
 class ActionType(str, Enum):
     """
@@ -16,6 +35,7 @@ class ActionType(str, Enum):
     DEBUG = "DEBUG"             # Analyse d'erreurs d'exécution
     FIX = "FIX"                 # Application de correctifs
 
+@timed("logging")
 def log_experiment(agent_name: str, model_used: str, action: ActionType, details: dict, status: str):
     """
     Enregistre une interaction d'agent pour l'analyse scientifique.
@@ -69,21 +89,140 @@ def log_experiment(agent_name: str, model_used: str, action: ActionType, details
         "status": status
     }
 
-    # --- 4. LECTURE & ÉCRITURE ROBUSTE ---
-    data = []
-    if os.path.exists(LOG_FILE):
-        try:
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if content: # Vérifie que le fichier n'est pas juste vide
-                    data = json.loads(content)
-        except json.JSONDecodeError:
-            # Si le fichier est corrompu, on repart à zéro (ou on pourrait sauvegarder un backup)
-            print(f"⚠️ Attention : Le fichier de logs {LOG_FILE} était corrompu. Une nouvelle liste a été créée.")
-            data = []
-
-    data.append(entry)
-    
-    # Écriture
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+    # --- 4. ÉCRITURE ASYNCHRONE ---
+    # L'entrée est mise en file d'attente ; le thread d'écriture l'ajoute en fin de fichier.
+    # Coût O(1) par appel, quel que soit le nombre d'entrées déjà enregistrées.
+    _get_writer().put(entry)
+
+@timed("logging")
+def flush_logs():
+    """Bloque jusqu'à ce que toutes les entrées en attente soient écrites sur disque."""
+    if _WRITER is not None:
+        _WRITER.flush()
+
+class _LogWriter:
+    """
+    Thread d'écriture en arrière-plan.
+    Regroupe les entrées reçues pendant LOG_FLUSH_INTERVAL et les ajoute au fichier en une fois.
+    Un seul thread écrit par processus ; entre processus (workers du mode --worker, qui partagent le
+    même fichier), l'ajout et la rotation se font sous un verrou fcntl (<fichier>.lock).
+    """
+
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="experiment-logger", daemon=True)
+        self.thread.start()
+
+    def put(self, entry: dict):
+        self.queue.put(entry)
+
+    def flush(self):
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            entries = [self.queue.get()]
+            # On laisse les autres entrées s'accumuler au plus LOG_FLUSH_INTERVAL, puis on écrit
+            deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+            try:
+                while len(entries) < 1000:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    entries.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                pass
+
+            try:
+                self._write(entries)
+            except Exception as e:
+                print(f"⚠️ Écriture des logs impossible ({len(entries)} entrées perdues) : {e}")
+            finally:
+                for _ in entries:
+                    self.queue.task_done()
+
+    def _write(self, entries: list):
+        os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+        lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+        # fichier ouvert sous le verrou : jamais un ajout dans un fichier qu'un autre processus vient d'archiver
+        with file_lock(self.log_file + ".lock"):
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                size = f.tell()
+            if size >= LOG_MAX_BYTES:
+                self._rotate()
+
+    def _rotate(self):
+        """Archive le fichier courant ; appelé sous le verrou de _write."""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        root, ext = os.path.splitext(self.log_file)
+        archive = f"{root}.{stamp}{ext}"
+        os.replace(self.log_file, archive)
+        if LOG_COMPRESS:
+            with open(archive, "rb") as src, gzip.open(archive + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(archive)
+
+_WRITER = None
+_WRITER_LOCK = threading.Lock()
+
+def _get_writer() -> _LogWriter:
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = _LogWriter(LOG_FILE)
+            atexit.register(_WRITER.flush)
+        return _WRITER
+
+def iter_log_entries(log_file: str = LOG_FILE):
+    """
+    Parcourt toutes les entrées : archives de rotation (.jsonl / .jsonl.gz) puis fichier courant.
+    Les lignes illisibles (ex: écriture interrompue) sont ignorées.
+    """
+    root, ext = os.path.splitext(log_file)
+    paths = sorted(glob.glob(f"{glob.escape(root)}.*{ext}") + glob.glob(f"{glob.escape(root)}.*{ext}.gz"))
+    paths = [p for p in paths if p != log_file] + [log_file]
+
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+def convert_legacy_log(legacy_file: str = LEGACY_LOG_FILE, log_file: str = LOG_FILE) -> int:
+    """
+    Convertit l'ancien format (tableau JSON) en JSON Lines, en ajoutant à la fin de log_file.
+    Le fichier d'origine n'est pas modifié.
+
+    Returns:
+        int: Nombre d'entrées converties.
+    """
+    if not os.path.exists(legacy_file):
+        return 0
+
+    with open(legacy_file, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+    data = json.loads(content) if content else []
+    if not isinstance(data, list):
+        raise ValueError(f"❌ {legacy_file} n'est pas un tableau JSON.")
+
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+    with open(log_file, "a", encoding="utf-8") as f:
+        for entry in data:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return len(data)
+
+if __name__ == "__main__":
+    # python -m src.utils.logger : migre logs/experiment_data.json vers logs/experiment_data.jsonl
+    count = convert_legacy_log()
+    print(f"✅ {count} entrées converties vers {LOG_FILE}")
@@ -0,0 +1,41 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from src.utils.tracing import span
+
+# stage -> [cumulated seconds, number of calls]
+_TIMINGS: Dict[str, list] = {}
+_TIMINGS_LOCK = threading.Lock()
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Adds the duration of the block to the cumulated time of a pipeline stage.
+    Stages running in parallel threads are summed, so totals can exceed the wall-clock time.
+
+    Usable as a context manager (with timed("pylint"): ...) or as a decorator (@timed("pylint")).
+    With --trace-dir, each call is also recorded as a span named after the stage.
+    """
+    start = time.perf_counter()
+    try:
+        with span(stage, category="stage"):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _TIMINGS_LOCK:
+            total = _TIMINGS.setdefault(stage, [0.0, 0])
+            total[0] += elapsed
+            total[1] += 1
+
+
+def get_stage_timings() -> Dict[str, dict]:
+    """Returns { stage: {"seconds": float, "calls": int} }."""
+    with _TIMINGS_LOCK:
+        return {stage: {"seconds": round(t[0], 4), "calls": t[1]} for stage, t in sorted(_TIMINGS.items())}
+
+
+def reset_stage_timings():
+    with _TIMINGS_LOCK:
+        _TIMINGS.clear()
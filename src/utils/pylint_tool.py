@@ -1,23 +1,311 @@
-# Un fichier pour l auditeur, pour detecter les erreurs 
-import sys        # pour lancer pylint avec venv
-import subprocess # pour executer des commandes externes (pylint)
-import re         # necessaire pour obtinir un score numérique exact 
+# Un fichier pour l auditeur, pour detecter les erreurs
+import configparser
+import hashlib    # cle du cache : hash du contenu + hash du .pylintrc
+import io         # pour capturer la sortie JSON de pylint
+import json
+import multiprocessing
 import os         # pour securiser path des fichiers
+import signal
+import sys
+import sysconfig
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict # le format de sortie
-from time import sleep
+from src.utils.metrics import timed
+from src.utils.tracing import add_span_attributes
+
+# Nombre de processus pylint persistants (astroid + checkers charges une seule fois par processus)
+PYLINT_WORKERS = int(os.getenv("PYLINT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PYLINT_TIMEOUT = 30  # eviter les boucles infinies (mesure dans le worker : l'attente dans la file ne compte pas)
+
+# Fichiers de configuration cherches dans le dossier courant (comme le faisait `python -m pylint`)
+RCFILE_NAMES = (".pylintrc", "pylintrc")
+
+# Checks qui comparent les fichiers entre eux : invisibles quand chaque fichier est analyse seul,
+# ils sont lances a part sur tout le batch (symbole -> id, pour respecter le `disable` du .pylintrc)
+CROSS_FILE_CHECKS = {"duplicate-code": "R0801", "cyclic-import": "R0401"}
+
+# cache par fichier : (chemin, hash contenu, hash rcfile) -> resultat du worker, qui contient aussi les
+# hash des fichiers du projet importes (messages E1101 / E0611 / E0401... et score en dependent)
+_CACHE: Dict[tuple, dict] = {}
+_CACHE_LOCK = threading.Lock()
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+class _LintTimeout(BaseException):
+    """BaseException : pylint attrape les Exception de ses checkers et les rapporte en astroid-error."""
+
+
+def _on_alarm(signum, frame):
+    raise _LintTimeout()
+
+
+def _loaded_project_files(file_path: str) -> Dict[str, str]:
+    """
+    Fichiers .py charges par astroid pendant l'analyse, hors bibliotheque standard et site-packages :
+    les modules du projet que le fichier importe. {chemin: hash}
+    """
+    import astroid
+
+    excluded = {os.path.realpath(p) + os.sep for p in
+                {sys.prefix, sys.base_prefix, sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"]}}
+    own = os.path.realpath(file_path)
+    dependencies = {}
+    for module in list(astroid.MANAGER.astroid_cache.values()):
+        path = getattr(module, "file", None)
+        if not path or not path.endswith(".py"):
+            continue
+        real = os.path.realpath(path)
+        if real == own or any(real.startswith(prefix) for prefix in excluded) or not os.path.isfile(real):
+            continue
+        dependencies[real] = _hash_file(real)
+    return dependencies
+
+
+def _run_api(args: list, timeout: float):
+    """
+    Lance pylint via son API Python avec le reporter JSON (plus de parsing de texte).
+    Le delai est compte ici, a partir du debut de l'analyse (SIGALRM, le worker execute les taches
+    dans son thread principal) : un depassement renvoie None sans tuer le pool.
+    """
+    import astroid
+    from pylint.lint import Run
+    from pylint.reporters import JSONReporter
+
+    # astroid garde les modules deja analyses en memoire : les fichiers ont pu changer depuis
+    astroid.MANAGER.clear_cache()
+
+    buffer = io.StringIO()
+    use_alarm = hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        run = Run(args, reporter=JSONReporter(buffer), exit=False)
+    except _LintTimeout:
+        return None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    messages = json.loads(buffer.getvalue() or "[]")
+    findings = [
+        {
+            "path": m["path"],
+            "line": m["line"],
+            "column": m["column"],
+            "symbol": m["symbol"],
+            "message_id": m["message-id"],
+            "category": m["type"],
+            "message": m["message"],
+            "module": m["module"],
+        }
+        for m in messages
+    ]
+    return run, findings
+
+
+def _lint_file(file_path: str, rcfile: str, timeout: float = PYLINT_TIMEOUT) -> dict:
+    """
+    Execute dans un processus du pool : lance pylint sur UN fichier.
+    Le score par fichier est desactive, le score global est recalcule a partir des stats.
+    """
+    args = [file_path, "--score=n"]
+    if rcfile:
+        args += ["--rcfile", rcfile]
+    output = _run_api(args, timeout)
+    if output is None:
+        return {"timeout": True}
+    run, findings = output
+    stats = run.linter.stats
+    return {
+        "findings": findings,
+        "returncode": run.linter.msg_status,
+        "statement": stats.statement,
+        "error": stats.error,
+        "warning": stats.warning,
+        "refactor": stats.refactor,
+        "convention": stats.convention,
+        "fatal": stats.fatal,
+        "info": stats.info,
+        "dependencies": _loaded_project_files(file_path),
+    }
+
+
+def _lint_cross_files(file_list: list, rcfile: str, checks: list, timeout: float = PYLINT_TIMEOUT) -> dict:
+    """
+    Execute dans un processus du pool : seulement les checks inter-fichiers (duplicate-code,
+    cyclic-import) sur tout le batch en un seul Run. Les statements sont deja comptes par les
+    analyses par fichier : seuls les messages de ces checks s'ajoutent au score (categorie refactor).
+    """
+    args = list(file_list) + ["--score=n", "--disable=all", f"--enable={','.join(checks)}"]
+    if rcfile:
+        args += ["--rcfile", rcfile]
+    output = _run_api(args, timeout)
+    if output is None:
+        return {"timeout": True}
+    run, findings = output
+    findings = [f for f in findings if f["symbol"] in checks]
+    return {
+        "findings": findings,
+        "returncode": 8 if findings else 0,  # bit "refactor" du code de sortie de pylint
+        "statement": 0,
+        "error": 0,
+        "warning": 0,
+        "refactor": len(findings),
+        "convention": 0,
+        "fatal": run.linter.stats.fatal,
+        "info": 0,
+    }
+
+
+def _cacheable(result: dict) -> bool:
+    """Un resultat avec une erreur fatale (crash d'astroid, fichier illisible...) n'est pas garde en cache."""
+    return not result["fatal"] and not any(
+        f["category"] == "fatal" or f["symbol"] == "astroid-error" for f in result["findings"])
+
+
+def _enabled_cross_checks(rcfile: str) -> list:
+    """Checks de CROSS_FILE_CHECKS que le .pylintrc ne desactive pas (`disable=` de n'importe quelle section)."""
+    disabled = set()
+    if rcfile:
+        parser = configparser.ConfigParser(interpolation=None)
+        try:
+            parser.read(rcfile, encoding="utf-8")
+        except configparser.Error:
+            pass
+        for section in parser.sections():
+            raw = parser.get(section, "disable", fallback="")
+            disabled.update(item.strip() for item in raw.replace("\n", ",").split(","))
+    return [symbol for symbol, message_id in CROSS_FILE_CHECKS.items()
+            if symbol not in disabled and message_id not in disabled]
+
+
+def _is_fresh(result: dict) -> bool:
+    """Un resultat en cache reste valable tant qu'aucun fichier importe n'a change."""
+    for path, digest in result.get("dependencies", {}).items():
+        try:
+            if _hash_file(path) != digest:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # "spawn" : les agents tournent dans des threads, un fork serait dangereux
+            _POOL = ProcessPoolExecutor(max_workers=max(1, PYLINT_WORKERS),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def _reset_pool():
+    """Tue les workers (ex: pylint bloque au-dela du delai) ; un nouveau pool sera cree au prochain appel."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _find_rcfile() -> str:
+    for name in RCFILE_NAMES:
+        if os.path.isfile(name):
+            return os.path.abspath(name)
+    return ""
+
+
+def _hash_file(path: str) -> str:
+    if not path:
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _format_findings(findings: list) -> str:
+    """Texte au format habituel de pylint (`path:line:col: ID: message (symbol)`), groupe par module."""
+    lines = []
+    current_module = None
+    for f in findings:
+        if f["module"] != current_module:
+            current_module = f["module"]
+            lines.append(f"************* Module {current_module}")
+        lines.append(f"{f['path']}:{f['line']}:{f['column']}: {f['message_id']}: {f['message']} ({f['symbol']})")
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def summarize_findings(findings: list) -> str:
+    """
+    Resume compact par fichier puis par symbole, utilise par l'Auditor a la place du stdout brut.
+
+    a.py (3 issues)
+      - missing-function-docstring (C0116) x2: lines 2, 5
+      - unused-import (W0611): line 1 - Unused import os
+    """
+    if not findings:
+        return "No issues reported."
+
+    by_file = {}
+    for f in findings:
+        by_file.setdefault(f["path"], {}).setdefault((f["symbol"], f["message_id"]), []).append(f)
+
+    lines = []
+    for path, symbols in by_file.items():
+        total = sum(len(items) for items in symbols.values())
+        lines.append(f"{path} ({total} issue{'s' if total > 1 else ''})")
+        for (symbol, message_id), items in sorted(symbols.items(), key=lambda kv: (-len(kv[1]), kv[0])):
+            numbers = sorted({item["line"] for item in items})
+            shown = ", ".join(str(n) for n in numbers[:10]) + (", ..." if len(numbers) > 10 else "")
+            if len(items) == 1:
+                lines.append(f"  - {symbol} ({message_id}): line {shown} - {items[0]['message']}")
+            else:
+                lines.append(f"  - {symbol} ({message_id}) x{len(items)}: lines {shown}")
+    return "\n".join(lines)
+
+
+def _compute_score(results: list) -> float:
+    """Formule d'evaluation par defaut de pylint, appliquee aux stats cumulees de tous les fichiers."""
+    statement = sum(r["statement"] for r in results)
+    error = sum(r["error"] for r in results)
+    warning = sum(r["warning"] for r in results)
+    refactor = sum(r["refactor"] for r in results)
+    convention = sum(r["convention"] for r in results)
+    fatal = sum(r["fatal"] for r in results)
+    if statement == 0:
+        # fichiers vides (ex: __init__.py) : pylint ne donne pas de score
+        return 0.0 if (fatal or error or warning or refactor or convention) else 10.0
+    if fatal:
+        return 0.0
+    return round(max(0.0, 10.0 - (float(5 * error + warning + refactor + convention) / statement) * 10), 2)
+
 
 # dict: contient le score, code retour, stdout, stderr, issues_count
+@timed("pylint")
 def run_pylint(file_list: list) -> Dict:
     """
-    Runs pylint on a single Python file and returns analysis results.
-    
+    Runs pylint on the given Python files and returns analysis results.
+
+    Files are linted one by one in a pool of long-lived processes (pylint Python API),
+    and every result is cached by (path, content hash, .pylintrc hash): an unchanged
+    file is never re-linted. The checks that compare files (duplicate-code, cyclic-import)
+    run in one extra pylint call over the whole batch, cached under the batch's keys.
+    Results with fatal messages (astroid crash, unreadable file) are never cached.
+
     Args:
-        file_list: Path to the Python file to analyze
-        
+        file_list: Paths to the Python files to analyze
+
     Returns:
-        Dict with keys: score, returncode, stdout, stderr, issues_count
+        Dict with keys: score, returncode, stdout, stderr, issues_count,
+        findings (list of {path, line, column, symbol, message_id, category, message}),
+        summary (compact per-file / per-symbol text for prompts)
     """
-    sleep(2)
     # Verifie si le fichier existe
     for file in file_list:
       if not os.path.isfile(file):
@@ -26,7 +314,9 @@ def run_pylint(file_list: list) -> Dict:
             "returncode": -1,
             "stdout": "",
             "stderr": f"Erreur : le fichier '{file}' n'existe pas !",
-            "issues_count": 0
+            "issues_count": 0,
+            "findings": [],
+            "summary": ""
         }
 
     # Verifie que c'est bien un fichier Python
@@ -37,29 +327,77 @@ def run_pylint(file_list: list) -> Dict:
             "returncode": -1,
             "stdout": "",
             "stderr": f"Erreur : '{file}' n'est pas un fichier Python !",
-            "issues_count": 0
+            "issues_count": 0,
+            "findings": [],
+            "summary": ""
         }
-    
+
+    rcfile = _find_rcfile()
+    rc_hash = _hash_file(rcfile)
+
+    results = []
     try:
-        # Execute pylint sur le fichier specifique
-        result = subprocess.run(
-            [sys.executable, "-m", "pylint", *file_list],
-            capture_output=True,
-            text=True,
-            timeout=30  # eviter les boucles infinies
-        )
-
-        stdout = result.stdout
-        stderr = result.stderr
-        returncode = result.returncode
-
-    except subprocess.TimeoutExpired:
+        # 1. Cache : on ne soumet que les fichiers modifies (eux ou un des fichiers du projet qu'ils importent)
+        keys = [(os.path.abspath(f), _hash_file(f), rc_hash) for f in file_list]
+        found, pending = {}, {}
+        for file, key in zip(file_list, keys):
+            with _CACHE_LOCK:
+                cached = _CACHE.get(key)
+            if cached is not None and _is_fresh(cached):
+                found[key] = cached
+            elif key not in pending:
+                pending[key] = _get_pool().submit(_lint_file, file, rcfile)
+
+        # checks inter-fichiers : un Run de plus sur tout le batch, en cache sous la liste des cles
+        cross_checks = _enabled_cross_checks(rcfile)
+        unique_keys = sorted(set(keys))
+        cross_key = ("cross-file", tuple(unique_keys))
+        if cross_checks and len(unique_keys) > 1:
+            with _CACHE_LOCK:
+                cached = _CACHE.get(cross_key)
+            if cached is not None:
+                found[cross_key] = cached
+            else:
+                files = list(dict(zip(keys, file_list)).values())  # un chemin par fichier distinct
+                pending[cross_key] = _get_pool().submit(_lint_cross_files, files, rcfile, cross_checks)
+        add_span_attributes(files=len(file_list), linted=len(pending),
+                            bytes=sum(os.path.getsize(f) for f in file_list))
+
+        # 2. Execute pylint (en parallele) sur les fichiers restants
+        for key, future in pending.items():
+            result = future.result()
+            if result.get("timeout"):
+                raise FutureTimeoutError()
+            found[key] = result
+            if _cacheable(result):
+                with _CACHE_LOCK:
+                    _CACHE[key] = result
+
+        results = [found[key] for key in keys]
+        if cross_key in found:
+            results.append(found[cross_key])
+
+    except FutureTimeoutError:
+        # le worker a abandonne l'analyse lui-meme : le pool partage reste en service
         return{
             "score": 0.0,
             "returncode": -2,
             "stdout": "",
             "stderr": "Erreur: pylint a depacé le délai !",
-            "issues_count": 0
+            "issues_count": 0,
+            "findings": [],
+            "summary": ""
+        }
+    except BrokenProcessPool as e:
+        _reset_pool()
+        return{
+            "score": 0.0,
+            "returncode": -3,
+            "stdout": "",
+            "stderr": f"Erreur: Erreur inattendue : {str(e)} !",
+            "issues_count": 0,
+            "findings": [],
+            "summary": ""
         }
     except Exception as e:
         return{
@@ -67,37 +405,30 @@ def run_pylint(file_list: list) -> Dict:
             "returncode": -3,
             "stdout": "",
             "stderr": f"Erreur: Erreur inattendue : {str(e)} !",
-            "issues_count": 0
+            "issues_count": 0,
+            "findings": [],
+            "summary": ""
         }
 
+    # score global recalcule a partir des stats de chaque fichier
+    score = _compute_score(results)
 
-    # extraire le score
-    score = 0.0
-    score_match = re.search(r"rated at (-?[0-9]+\.[0-9]+)", stdout)
-    if score_match:
-        try:
-            score = float(score_match.group(1)) # convertir une chaine de caracteres en un nombre 
-        except ValueError:
-            score = 0.0
+    findings = [f for r in results for f in r["findings"]]
 
+    stdout = _format_findings(findings)
+    stdout += f"\n------------------------------------------------------------------\nYour code has been rated at {score:.2f}/10\n"
 
-    # compter les lignes de probleme signalés par pylint
-    lines = stdout.strip().split('\n') #.strip() : supprime les espaces et retours a la ligne , .split() : decoupe la chaine en une liste de lignes
-    issues_count = 0
-    for line in lines:
-        line = line.strip()
-        if line and not line.startswith("Your code") and ":" in line and any(code in line for code in ["C","W","E","F","R"]):
-            # if line : si la ligne n est pas vide
-            # ":" in line : toutes les vrais lignes de probleme dans pylint contiennent au moins un ":"
-            # any(code in line for code in ["C","W","E","F","R"]) :verifie que la ligne contient un code de categorie pylint (convention, warning, error, fatal, refactor)
-
-            issues_count += 1
+    returncode = 0
+    for r in results:
+        returncode |= r["returncode"]
+    add_span_attributes(score=score, issues=len(findings))
 
     return {
         "score": score,
         "returncode": returncode,
         "stdout": stdout,
-        "stderr": stderr,
-        "issues_count": issues_count
-
+        "stderr": "",
+        "issues_count": len(findings),
+        "findings": findings,
+        "summary": summarize_findings(findings)
     }
@@ -0,0 +1,179 @@
+# Serveur pytest "chaud" : pytest (et des modules tiers optionnels) sont importes UNE fois,
+# puis chaque execution se fait dans un enfant forke, qui importe les modules du projet a neuf.
+import atexit
+import importlib
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Optional, Tuple
+
+# Active via PYTEST_SERVER=1 (ou --warm-pytest dans main.py)
+_ENABLED = os.getenv("PYTEST_SERVER", "0") == "1"
+
+# Modules tiers a precharger dans le serveur, separes par des virgules (ex: "numpy,requests")
+PYTEST_SERVER_PRELOAD = os.getenv("PYTEST_SERVER_PRELOAD", "")
+
+# Delai de demarrage du serveur (import de pytest et des modules prechargees)
+PYTEST_SERVER_START_TIMEOUT = 60
+
+_SERVER = None
+_SERVER_LOCK = threading.Lock()
+# Cause de l'echec du demarrage : on ne relance pas le serveur, tout passe par le subprocess classique
+_START_ERROR: Optional[str] = None
+
+
+class PytestTimeout(Exception):
+    """L'enfant a depasse le delai (tue par SIGALRM)."""
+
+
+def set_pytest_server_enabled(enabled: bool):
+    global _ENABLED
+    _ENABLED = enabled
+
+
+def is_pytest_server_enabled() -> bool:
+    # fork() n'existe pas sous Windows : on garde le subprocess classique
+    return _ENABLED and hasattr(os, "fork") and _START_ERROR is None
+
+
+def _run_child(conn):
+    """Execute dans l'enfant forke : lance pytest, renvoie (returncode, stdout, stderr), puis meurt."""
+    request = conn.recv()
+    signal.alarm(request["timeout"])  # SIGALRM tue l'enfant s'il depasse le delai
+
+    os.chdir(request["cwd"])
+    project_root = request["project_root"]
+    sys.path.insert(0, project_root)
+    os.environ["PYTHONPATH"] = f"{project_root}{os.pathsep}{os.environ.get('PYTHONPATH', '')}"
+
+    # Capture au niveau des descripteurs : couvre aussi les sous-processus et le code C
+    out_file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+    err_file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+    os.dup2(out_file.fileno(), 1)
+    os.dup2(err_file.fileno(), 2)
+
+    import pytest
+    try:
+        # plugins deja importes par le serveur : pytest ne peut plus reecrire leurs assert, sans importance
+        returncode = int(pytest.main([*request["files"], "-v", "-W", "ignore::pytest.PytestAssertRewriteWarning"]))
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else 1
+    except BaseException as e:
+        print(f"Erreur inattendue : {e}", file=sys.stderr)
+        returncode = 3
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    out_file.seek(0)
+    err_file.seek(0)
+    conn.send((returncode, out_file.read(), err_file.read()))
+    conn.close()
+
+
+def _serve(address: str, authkey: bytes, preload: str, ready):
+    """Boucle du serveur : un fork par requete, les enfants sont recuperes automatiquement."""
+    import pytest  # noqa: F401  (le but est de le charger une fois pour toutes)
+    from importlib.metadata import entry_points
+
+    # Plugins pytest installes (entry points "pytest11") : souvent l'essentiel du temps de demarrage
+    for entry_point in entry_points(group="pytest11"):
+        try:
+            entry_point.load()
+        except Exception as e:
+            print(f"⚠️ Préchargement du plugin {entry_point.name} impossible : {e}")
+
+    for module in filter(None, (m.strip() for m in preload.split(","))):
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"⚠️ Préchargement de {module} impossible : {e}")
+
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    ready.set()
+
+    while True:
+        conn = listener.accept()
+        pid = os.fork()
+        if pid == 0:
+            listener.close()
+            try:
+                _run_child(conn)
+            finally:
+                os._exit(0)
+        conn.close()
+
+
+class PytestServer:
+    """Processus serveur (demarre en 'spawn' : interpreteur propre, sans les threads des agents)."""
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="pytest_server_")
+        self.address = os.path.join(self.directory, "socket")
+        self.authkey = os.urandom(16)
+        context = multiprocessing.get_context("spawn")
+        ready = context.Event()
+        self.process = context.Process(
+            target=_serve, args=(self.address, self.authkey, PYTEST_SERVER_PRELOAD, ready), daemon=True
+        )
+        self.process.start()
+        # un serveur mort au demarrage (import qui plante...) est detecte sans attendre tout le delai
+        deadline = time.monotonic() + PYTEST_SERVER_START_TIMEOUT
+        while not ready.wait(timeout=0.1):
+            if not self.process.is_alive():
+                raise RuntimeError(f"Le serveur pytest s'est arrêté au démarrage (code {self.process.exitcode}).")
+            if time.monotonic() >= deadline:
+                self.stop()
+                raise RuntimeError("Le serveur pytest n'a pas démarré.")
+
+    def run(self, file_list: list, project_root: str, timeout: int) -> Tuple[int, str, str]:
+        start = time.monotonic()
+        with Client(self.address, family="AF_UNIX", authkey=self.authkey) as conn:
+            conn.send({"files": file_list, "project_root": project_root, "timeout": timeout, "cwd": os.getcwd()})
+            # marge pour la collecte des resultats ; SIGALRM coupe l'enfant au bout de `timeout`
+            if not conn.poll(timeout + 5):
+                raise PytestTimeout()
+            try:
+                return conn.recv()
+            except EOFError:
+                if time.monotonic() - start >= timeout:
+                    raise PytestTimeout()
+                raise RuntimeError("Le processus pytest s'est arrêté sans résultat.")
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+
+
+def _get_server() -> Optional[PytestServer]:
+    global _SERVER, _START_ERROR
+    with _SERVER_LOCK:
+        if _START_ERROR is not None:
+            raise RuntimeError(_START_ERROR)
+        if _SERVER is None or not _SERVER.process.is_alive():
+            try:
+                _SERVER = PytestServer()
+            except Exception as e:
+                _SERVER, _START_ERROR = None, str(e)
+                raise
+            atexit.register(_SERVER.stop)
+        return _SERVER
+
+
+def run_pytest_warm(file_list: list, project_root: str, timeout: int) -> Tuple[int, str, str]:
+    """
+    Lance pytest via le serveur chaud.
+
+    Returns:
+        (returncode, stdout, stderr)
+
+    Raises:
+        PytestTimeout: si l'execution depasse `timeout` secondes.
+    """
+    return _get_server().run(file_list, project_root, timeout)
@@ -1,15 +1,24 @@
 #PS: take care of the file name, pytest_tool was not accepted as a file name since there is *test* in gitignore
 
 from datetime import time
+import re
 import subprocess
 import os
 import sys
 from typing import Dict
-from time import sleep
+from src.utils.metrics import timed
+from src.utils.tracing import add_span_attributes
+from src.utils.pytest_server import PytestTimeout, is_pytest_server_enabled, run_pytest_warm
 
+PYTEST_TIMEOUT = 30
 
+# "tests/test_a.py::test_x FAILED" (sortie -v) et "FAILED tests/test_a.py::test_x - ..." (resume court)
+_FAILED_VERBOSE = re.compile(r"^(\S+::\S+) (?:FAILED|ERROR)\b", re.MULTILINE)
+_FAILED_SUMMARY = re.compile(r"^(?:FAILED|ERROR) (\S+)", re.MULTILINE)
+
+
+@timed("pytest")
 def run_pytest(file_list: list, project_root: str = None) -> Dict:
-    sleep(2)
     # 1. Vérification du chemin
     for file in file_list:
       if not os.path.exists(file):
@@ -21,6 +30,8 @@ def run_pytest(file_list: list, project_root: str = None) -> Dict:
             "error_summary": "Chemin introuvable."
         }
 
+    add_span_attributes(files=len(file_list), warm=is_pytest_server_enabled())
+
     # 2. Préparation de l'environnement
     env = os.environ.copy()
     if project_root is None:
@@ -30,12 +41,30 @@ def run_pytest(file_list: list, project_root: str = None) -> Dict:
     env["PYTHONPATH"] = f"{project_root}{os.pathsep}{current_pythonpath}"
 
     # 3. Exécution de pytest
+    # Serveur chaud (pytest déjà importé, un fork par exécution) si activé, sinon nouvel interpréteur
+    if is_pytest_server_enabled():
+        try:
+            returncode, stdout, stderr = run_pytest_warm(
+                [os.path.abspath(f) for f in file_list], os.path.abspath(project_root), PYTEST_TIMEOUT
+            )
+            return _build_result(returncode, stdout, stderr)
+        except PytestTimeout:
+            return {
+                "returncode": -2,
+                "stdout": "",
+                "stderr": f"Erreur : pytest a dépassé le délai de {PYTEST_TIMEOUT} secondes.",
+                "test_passed": False,
+                "error_summary": "Timeout lors de l'exécution des tests."
+            }
+        except Exception as e:
+            print(f"⚠️ Serveur pytest indisponible ({e}), exécution classique.")
+
     try:
         result = subprocess.run(
             [sys.executable, "-m", "pytest", *file_list, "-v"],
             capture_output=True,
             text=True,
-            timeout=30,
+            timeout=PYTEST_TIMEOUT,
             env=env
         )
         stdout = result.stdout
@@ -46,7 +75,7 @@ def run_pytest(file_list: list, project_root: str = None) -> Dict:
         return {
             "returncode": -2,
             "stdout": "",
-            "stderr": "Erreur : pytest a dépassé le délai de 30 secondes.",
+            "stderr": f"Erreur : pytest a dépassé le délai de {PYTEST_TIMEOUT} secondes.",
             "test_passed": False,
             "error_summary": "Timeout lors de l'exécution des tests."
         }
@@ -59,8 +88,12 @@ def run_pytest(file_list: list, project_root: str = None) -> Dict:
             "error_summary": f"Exception système : {str(e)}"
         }
 
+    return _build_result(returncode, stdout, stderr)
+
+def _build_result(returncode: int, stdout: str, stderr: str) -> Dict:
     # 4. Analyse du résultat
     test_passed = (returncode == 0)
+    add_span_attributes(returncode=returncode, passed=test_passed, output_bytes=len(stdout) + len(stderr))
     error_summary = ""
 
     if not test_passed:
@@ -94,5 +127,12 @@ def run_pytest(file_list: list, project_root: str = None) -> Dict:
         "stdout": stdout,
         "stderr": stderr,
         "test_passed": test_passed,
-        "error_summary": error_summary
-    }
\ No newline at end of file
+        "error_summary": error_summary,
+        "failed_tests": [] if test_passed else parse_failed_tests(stdout)
+    }
+
+
+def parse_failed_tests(stdout: str) -> list:
+    """Identifiants (chemin::test) des tests en echec ou en erreur, tries, sans doublon."""
+    ids = set(_FAILED_VERBOSE.findall(stdout)) | set(_FAILED_SUMMARY.findall(stdout))
+    return sorted(ids)
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Starting / floor / ceiling request rates (requests per second), shared by every model
+LLM_RATE = float(os.getenv("LLM_RATE_LIMIT", "1.0"))
+LLM_MIN_RATE = float(os.getenv("LLM_RATE_LIMIT_MIN", "0.1"))
+LLM_MAX_RATE = float(os.getenv("LLM_RATE_LIMIT_MAX", "5.0"))
+
+# Number of requests allowed to go out back-to-back after an idle period
+LLM_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "2"))
+
+
+class TokenBucket:
+    """
+    Adaptive token bucket (AIMD).
+
+    - acquire() blocks until a request may be sent.
+    - on_success() slowly raises the rate (additive increase).
+    - on_rate_limited() halves the rate (multiplicative decrease) and honours Retry-After.
+    """
+
+    def __init__(self, rate: float = LLM_RATE, burst: int = LLM_BURST,
+                 min_rate: float = LLM_MIN_RATE, max_rate: float = LLM_MAX_RATE):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+
+_LIMITERS: Dict[str, TokenBucket] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(model_name: str) -> TokenBucket:
+    """Returns the process-wide limiter of a model (e.g. 'mistral-large-latest')."""
+    with _LIMITERS_LOCK:
+        if model_name not in _LIMITERS:
+            _LIMITERS[model_name] = TokenBucket()
+        return _LIMITERS[model_name]
+
+
+def is_rate_limit_error(error: Exception) -> Tuple[bool, Optional[float]]:
+    """
+    Detects an HTTP 429 coming from the LLM client, from the status code only
+    (error.status_code, or error.response.status_code for httpx.HTTPStatusError), also on the
+    exceptions it was raised from. The message text is not used: "429" can be a line number or an id.
+
+    Returns:
+        (is_rate_limited, retry_after_seconds or None)
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if status == 429:
+            break
+        error = error.__cause__ or error.__context__
+    else:
+        return False, None
+
+    retry_after = None
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+    try:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        retry_after = float(value) if value is not None else None
+    except (TypeError, ValueError):
+        retry_after = None
+    return True, retry_after
@@ -0,0 +1,251 @@
+# Construction du sandbox : miroir du projet cible sans .git / venv / build..., en partageant les
+# blocs des fichiers (reflink, copie-sur-ecriture) quand le systeme de fichiers le permet, sinon par copie.
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import List, Tuple
+
+# Dossiers / fichiers jamais copies dans le sandbox (meme syntaxe que le .gitignore)
+DEFAULT_EXCLUDES = [
+    ".git", ".hg", ".svn", "venv/", ".venv/", "node_modules/", "__pycache__/",
+    "/build/", "/dist/", "/sandbox/", ".tox/", ".nox/", ".pytest_cache/", ".mypy_cache/", ".cache/", "*.egg-info/",
+]
+
+# "auto" : reflink, sinon copie ; "copy" : toujours une vraie copie ;
+# "hardlink" (sur demande uniquement) : reflink, puis hardlink, puis copie. Un hardlink partage l'inode avec le
+# projet d'origine : toute ecriture en place dans le sandbox (tests generes, code execute par pytest...)
+# modifie aussi l'original. Seuls write_file et black cassent le lien avant d'ecrire.
+SANDBOX_LINK_MODE = os.getenv("SANDBOX_LINK_MODE", "auto")
+_LINK_METHODS = {
+    "auto": ["reflink", "copy"],
+    "copy": ["copy"],
+    "hardlink": ["reflink", "hardlink", "copy"],
+}
+
+MANIFEST_NAME = ".sandbox_manifest.json"
+
+# ioctl Linux FICLONE (_IOW(0x94, 9, int)) : copie-sur-ecriture sur btrfs, xfs, bcachefs...
+_FICLONE = 0x40049409
+
+
+def load_gitignore(root: str) -> List[str]:
+    """Motifs du .gitignore a la racine du projet (les negations `!motif` ne sont pas gerees)."""
+    path = os.path.join(root, ".gitignore")
+    if not os.path.isfile(path):
+        return []
+    patterns = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(("#", "!")):
+                patterns.append(line)
+    return patterns
+
+
+def is_excluded(relative_path: str, is_dir: bool, patterns: List[str]) -> bool:
+    """
+    Applique les motifs facon .gitignore a un chemin relatif (separateur '/').
+    `motif/` ne vise que les dossiers, `/motif` ou `a/b` est ancre a la racine, sinon le nom seul suffit.
+    """
+    name = relative_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatch(relative_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def iter_project_files(root: str, patterns: List[str]):
+    """Fichiers du projet (chemins relatifs, '/' comme separateur), dossiers exclus non parcourus."""
+    for current, dirs, files in os.walk(root):
+        relative_dir = os.path.relpath(current, root).replace(os.sep, "/")
+        relative_dir = "" if relative_dir == "." else relative_dir + "/"
+        dirs[:] = sorted(d for d in dirs if not is_excluded(relative_dir + d, True, patterns))
+        for name in sorted(files):
+            relative_path = relative_dir + name
+            if not is_excluded(relative_path, False, patterns):
+                yield relative_path
+
+
+def _reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as source, open(dst, "wb") as target:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.unlink(dst)
+        return False
+
+
+class _Linker:
+    """Garde la premiere methode qui marche (voir _LINK_METHODS) pour tout le sandbox."""
+
+    def __init__(self, mode: str):
+        if mode not in _LINK_METHODS:
+            print(f"⚠️ SANDBOX_LINK_MODE={mode} inconnu, copie des fichiers.")
+        self.methods = list(_LINK_METHODS.get(mode, ["copy"]))
+        if mode == "hardlink":
+            print("⚠️ SANDBOX_LINK_MODE=hardlink : une écriture en place dans le sandbox modifie le projet d'origine.")
+        self.counts = {}
+
+    def place(self, src: str, dst: str):
+        while True:
+            method = self.methods[0]
+            if method == "copy":
+                shutil.copy2(src, dst)
+                break
+            if method == "reflink" and _reflink(src, dst):
+                break
+            if method == "hardlink":
+                try:
+                    os.link(src, dst)
+                    break
+                except OSError:
+                    pass
+            self.methods.pop(0)  # non supporte (autre systeme de fichiers...) : on descend d'un cran
+        self.counts[method] = self.counts.get(method, 0) + 1
+
+
+def _signature(path: str) -> list:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def _load_manifest(sandbox_path: str) -> dict:
+    try:
+        with open(os.path.join(sandbox_path, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_sandbox(target_dir: str, sandbox_root: str, reuse: bool = False, run_id: str = None,
+                  excludes: List[str] = None) -> Tuple[str, dict]:
+    """
+    Cree (ou resynchronise) le sandbox de `target_dir`.
+
+    Sans `reuse`, un nouveau dossier `<projet>_<run_id>` est cree. Avec `reuse`, le dossier est
+    deterministe (`<projet>_<hash du chemin>`) et seuls les fichiers modifies depuis la derniere
+    synchronisation (source ou sandbox) sont remplaces ; les fichiers absents de la source sont supprimes.
+
+    Returns:
+        (chemin du sandbox, statistiques {methode: nb fichiers, "unchanged": n, "removed": n})
+    """
+    target_dir = os.path.abspath(target_dir)
+    project_name = os.path.basename(os.path.normpath(target_dir))
+    if reuse:
+        run_id = hashlib.sha1(target_dir.encode("utf-8")).hexdigest()[:8]
+    sandbox_path = os.path.join(sandbox_root, f"{project_name}_{run_id}")
+
+    patterns = (excludes if excludes is not None else DEFAULT_EXCLUDES) + load_gitignore(target_dir) + [MANIFEST_NAME]
+    # le sandbox lui-meme peut etre dans la cible (ex: lancement depuis le projet)
+    sandbox_abs = os.path.abspath(sandbox_root)
+    if sandbox_abs.startswith(target_dir + os.sep):
+        patterns.append("/" + os.path.relpath(sandbox_abs, target_dir).replace(os.sep, "/"))
+
+    if not reuse and os.path.exists(sandbox_path):
+        shutil.rmtree(sandbox_path)
+    os.makedirs(sandbox_path, exist_ok=True)
+
+    previous = _load_manifest(sandbox_path) if reuse else {}
+    manifest = {}
+    linker = _Linker(SANDBOX_LINK_MODE)
+    stats = {"unchanged": 0, "removed": 0}
+
+    for relative_path in iter_project_files(target_dir, patterns):
+        src = os.path.join(target_dir, relative_path)
+        dst = os.path.join(sandbox_path, relative_path)
+        src_signature = _signature(src)
+
+        entry = previous.get(relative_path)
+        if entry and entry["src"] == src_signature and os.path.exists(dst) and _signature(dst) == entry["dst"]:
+            manifest[relative_path] = entry
+            stats["unchanged"] += 1
+            continue
+
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        linker.place(src, dst)
+        manifest[relative_path] = {"src": src_signature, "dst": _signature(dst)}
+
+    if reuse:
+        # fichiers en trop (tests generes, sorties du run precedent...) : le sandbox redevient un miroir
+        for relative_path in iter_project_files(sandbox_path, patterns):
+            if relative_path not in manifest:
+                os.unlink(os.path.join(sandbox_path, relative_path))
+                stats["removed"] += 1
+        with open(os.path.join(sandbox_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    stats.update(linker.counts)
+    return sandbox_path, stats
+
+
+def break_link(path: str):
+    """
+    Donne a `path` son propre inode s'il est partage (hardlink vers le projet d'origine),
+    avant qu'un outil ne le modifie sur place (ex: black).
+    """
+    if os.path.isfile(path) and os.stat(path).st_nlink > 1:
+        with open(path, "rb") as f:
+            data = f.read()
+        _replace(path, data)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Verrou inter-processus (workers du mode --worker) ; simple no-op si fcntl n'existe pas (Windows)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def write_text_atomic(path: str, content: str) -> int:
+    """
+    Ecrit via un fichier temporaire + os.replace : le fichier d'origine d'un hardlink n'est jamais modifie,
+    et un lecteur ne voit jamais un fichier a moitie ecrit.
+    """
+    data = content.encode("utf-8")
+    _replace(path, data)
+    return len(content)
+
+
+def _replace(path: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else None
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Set
+
+
+def run_wavefront(batches: List[list], batch_dependencies: List[Set[int]],
+                  worker: Callable, max_workers: int = 4) -> Dict[int, object]:
+    """
+    Runs every batch as soon as all the batches it depends on are finished.
+
+    Independent batches run side by side (at most `max_workers` at a time), so the
+    wall-clock time is divided roughly by the width of the dependency DAG.
+
+    Args:
+        batches: List of batches (each batch is a list of file paths).
+        batch_dependencies: For each batch, the set of batch indexes it waits for.
+        worker: Function called with one batch. Its return value is collected.
+        max_workers: Maximum number of batches processed at the same time.
+
+    Returns:
+        Dict mapping batch index -> worker result (or the raised exception).
+        A failed batch still counts as finished, so its dependents are not blocked.
+    """
+    pending = set(range(len(batches)))
+    done = set()
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        running = {}
+        while pending or running:
+            # 1. Launch every batch whose dependencies are finished
+            ready = sorted(i for i in pending if batch_dependencies[i] <= done)
+            for i in ready:
+                pending.discard(i)
+                running[executor.submit(worker, batches[i])] = i
+
+            if not running:
+                raise ValueError(f"❌ Batches {sorted(pending)} have unsatisfiable dependencies.")
+
+            # 2. Wait for at least one batch to finish, then re-check the frontier
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = e
+                done.add(i)
+
+    return results
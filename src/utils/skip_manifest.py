@@ -0,0 +1,129 @@
+# Manifeste persistant, un par projet cible, range avec les sandboxes (jamais dans le projet lui-meme) :
+# d'un run a l'autre, un batch inchange qui passait deja (lui et ses dependances) n'est pas retraite,
+# ses sorties sont reprises du sandbox precedent.
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+from src.utils.sandbox import file_lock, write_text_atomic
+
+# Dossier des manifestes : SKIP_MANIFEST_DIR, sinon <racine des sandboxes>/.swarm_manifests
+SKIP_MANIFEST_DIR = os.getenv("SKIP_MANIFEST_DIR")
+SKIP_MANIFEST_DIRNAME = ".swarm_manifests"
+
+
+def hash_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _test_file_for(relative_path: str) -> str:
+    """Meme convention que le Judge : pkg/mod.py -> pkg/test_mod.py"""
+    directory, name = os.path.split(relative_path)
+    return os.path.join(directory, f"test_{name}")
+
+
+class SkipManifest:
+    """
+    Une entree par fichier (chemin relatif au projet) :
+    input_hash, output_hash, score, test_file, passed, sandbox, dependencies {fichier: input_hash}.
+    """
+
+    def __init__(self, target_dir: str, manifest_dir: str):
+        """
+        Args:
+            target_dir: Projet d'origine (lu pour les hash d'entree, jamais ecrit).
+            manifest_dir: Dossier des manifestes (SKIP_MANIFEST_DIR prend le pas s'il est defini).
+        """
+        self.target_dir = os.path.abspath(target_dir)
+        manifest_dir = SKIP_MANIFEST_DIR or manifest_dir
+        os.makedirs(manifest_dir, exist_ok=True)
+        project_key = hashlib.sha1(self.target_dir.encode("utf-8")).hexdigest()[:8]
+        self.path = os.path.join(manifest_dir, f"{os.path.basename(self.target_dir)}_{project_key}.json")
+        self.lock = threading.Lock()
+        self._input_hashes: Dict[str, Optional[str]] = {}
+        self.files: Dict[str, dict] = self._read()
+
+    def _read(self) -> Dict[str, dict]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Manifeste {self.path} illisible, ignoré : {e}")
+            return {}
+
+    def input_hash(self, relative_path: str) -> Optional[str]:
+        """Hash du fichier ORIGINAL (dans le projet cible, avant black et les agents)."""
+        with self.lock:
+            if relative_path not in self._input_hashes:
+                self._input_hashes[relative_path] = hash_file(os.path.join(self.target_dir, relative_path))
+            return self._input_hashes[relative_path]
+
+    def can_skip(self, batch: List[str], dependencies: List[str], threshold: float) -> bool:
+        """Tous les fichiers du batch inchanges, passes et au-dessus du seuil, dependances inchangees."""
+        for relative_path in batch:
+            entry = self.files.get(relative_path)
+            if not entry or not entry.get("passed") or (entry.get("score") or 0) < threshold:
+                return False
+            if entry.get("input_hash") != self.input_hash(relative_path):
+                return False
+            recorded = entry.get("dependencies", {})
+            if set(recorded) != set(dependencies):
+                return False
+            if any(recorded[d] != self.input_hash(d) for d in dependencies):
+                return False
+        return True
+
+    def restore(self, batch: List[str], sandboxed_dir: str) -> bool:
+        """
+        Recopie dans le nouveau sandbox les sorties (code + test) du run qui a valide le batch.
+        False si elles ne sont plus disponibles (sandbox supprime ou modifie) : le batch doit etre refait.
+        """
+        copies = []
+        for relative_path in batch:
+            entry = self.files[relative_path]
+            previous = entry.get("sandbox", "")
+            source = os.path.join(previous, relative_path)
+            if not previous or hash_file(source) != entry.get("output_hash"):
+                return False
+            copies.append((source, os.path.join(sandboxed_dir, relative_path)))
+            if entry.get("test_file"):
+                test_source = os.path.join(previous, entry["test_file"])
+                if not os.path.isfile(test_source):
+                    return False
+                copies.append((test_source, os.path.join(sandboxed_dir, entry["test_file"])))
+
+        for source, destination in copies:
+            if os.path.abspath(source) == os.path.abspath(destination):
+                continue  # meme sandbox (--reuse-sandbox / --resume)
+            with open(source, "r", encoding="utf-8") as f:
+                content = f.read()
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            write_text_atomic(destination, content)
+        return True
+
+    def record(self, batch: List[str], dependencies: List[str], sandboxed_dir: str, score, passed: bool):
+        """Enregistre le resultat d'un batch traite (appele depuis les threads des workers)."""
+        sandbox = os.path.abspath(sandboxed_dir)
+        entries = {}
+        for relative_path in batch:
+            test_file = _test_file_for(relative_path)
+            entries[relative_path] = {
+                "input_hash": self.input_hash(relative_path),
+                "output_hash": hash_file(os.path.join(sandbox, relative_path)),
+                "score": score,
+                "test_file": test_file if os.path.isfile(os.path.join(sandbox, test_file)) else "",
+                "passed": passed,
+                "sandbox": sandbox,
+                "dependencies": {d: self.input_hash(d) for d in dependencies},
+            }
+        with self.lock, file_lock(self.path + ".lock"):
+            # d'autres processus (workers) ont pu ecrire depuis : on fusionne avec la version sur disque
+            self.files = {**self._read(), **entries}
+            write_text_atomic(self.path, json.dumps({"files": self.files}, indent=2, sort_keys=True))
@@ -0,0 +1,91 @@
+import ast
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+
+class SourceEntry:
+    """One file as seen at a given (mtime, size): text, hash, AST and derived data (imports, signatures...)."""
+
+    def __init__(self, path: str, text: str, mtime_ns: int, size: int):
+        self.path = path
+        self.text = text
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.derived: Dict[str, object] = {}
+        self._tree = None
+        self._parsed = False
+        self.parse_error: Optional[Exception] = None
+
+    @property
+    def tree(self) -> Optional[ast.AST]:
+        """Parsed AST (parsed once, on first use). None if the file has a syntax error."""
+        if not self._parsed:
+            try:
+                self._tree = ast.parse(self.text)
+            except (SyntaxError, ValueError) as e:
+                self.parse_error = e
+            self._parsed = True
+        return self._tree
+
+
+class SourceIndex:
+    """
+    Per-run cache of project files, shared by batching, context building and main.py.
+
+    An entry is reused while the file keeps the same mtime and size; write_file() pushes
+    the new content directly with update(), so a Fixer output is never re-read from disk.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, SourceEntry] = {}
+        self.lock = threading.Lock()
+
+    def get(self, path: str) -> SourceEntry:
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        with open(key, "r", encoding="utf-8") as f:
+            text = f.read()
+        new_entry = SourceEntry(key, text, stat.st_mtime_ns, stat.st_size)
+        # Touched but identical file (e.g. black found nothing to change): keep the parsed data
+        if entry is not None and entry.digest == new_entry.digest:
+            entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+            return entry
+        with self.lock:
+            self.entries[key] = new_entry
+        return new_entry
+
+    def update(self, path: str, text: str):
+        """Registers content that was just written to `path`."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self.lock:
+            self.entries[key] = SourceEntry(key, text, stat.st_mtime_ns, stat.st_size)
+
+    def invalidate(self, path: str):
+        with self.lock:
+            self.entries.pop(os.path.abspath(path), None)
+
+    def text(self, path: str) -> str:
+        return self.get(path).text
+
+    def derived(self, path: str, name: str, compute: Callable[[SourceEntry], object]):
+        """
+        Memoizes data computed from a file version (e.g. "imports", "signatures").
+        Recomputed only when the file content changes.
+        """
+        entry = self.get(path)
+        if name not in entry.derived:
+            entry.derived[name] = compute(entry)
+        return entry.derived[name]
+
+
+# One index for the whole process
+SOURCE_INDEX = SourceIndex()
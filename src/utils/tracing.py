@@ -0,0 +1,191 @@
+"""
+Spans (graph nodes, LLM calls, pylint, pytest, black, file reads / writes), exported offline
+as Chrome trace-event JSON (chrome://tracing, Perfetto) and as OTLP-compatible JSON.
+
+Enabled with --trace-dir DIR (or TRACE_DIR=DIR). When disabled, span() costs a single check.
+"""
+import contextvars
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+_TRACE_DIR: Optional[str] = os.getenv("TRACE_DIR") or None
+
+# Context propagated to threads started through contextvars.copy_context (LangGraph does it for its nodes)
+_BATCH_ID = contextvars.ContextVar("trace_batch_id", default=None)
+_ITERATION = contextvars.ContextVar("trace_iteration", default=None)
+_NODE = contextvars.ContextVar("trace_node", default=None)
+_CURRENT_SPAN = contextvars.ContextVar("trace_current_span", default=None)
+
+_SPANS: List[dict] = []
+_SPANS_LOCK = threading.Lock()
+_SPAN_IDS = itertools.count(1)
+_RUN_TRACE_ID = hashlib.sha256(f"{os.getpid()}-{time.time_ns()}".encode()).hexdigest()[:32]
+
+
+def set_trace_dir(path: Optional[str]):
+    global _TRACE_DIR
+    _TRACE_DIR = path
+
+
+def is_tracing_enabled() -> bool:
+    return _TRACE_DIR is not None
+
+
+def _trace_id(batch_id: Optional[str]) -> str:
+    """One trace per batch (same id from one run to the next), one shared trace for the rest of the run."""
+    if batch_id is None:
+        return _RUN_TRACE_ID
+    return hashlib.sha256(batch_id.encode("utf-8")).hexdigest()[:32]
+
+
+@contextmanager
+def trace_context(batch_id: str = None, iteration: int = None, node: str = None):
+    """Sets the batch, iteration and / or graph node of the spans opened inside this block."""
+    tokens = []
+    if batch_id is not None:
+        tokens.append((_BATCH_ID, _BATCH_ID.set(batch_id)))
+    if iteration is not None:
+        tokens.append((_ITERATION, _ITERATION.set(iteration)))
+    if node is not None:
+        tokens.append((_NODE, _NODE.set(node)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def get_trace_context() -> dict:
+    """Current batch, iteration and node (also used by token accounting, see usage.py)."""
+    return {"batch_id": _BATCH_ID.get(), "iteration": _ITERATION.get(), "node": _NODE.get()}
+
+
+@contextmanager
+def span(name: str, category: str = "", **attributes):
+    """
+    Times a block. Usable as `with span("pylint", files=3):` or as a decorator.
+    Attributes only known at the end (sizes, tokens...) are added with add_span_attributes().
+    """
+    if _TRACE_DIR is None:
+        yield
+        return
+
+    parent = _CURRENT_SPAN.get()
+    record = {
+        "name": name,
+        "category": category,
+        "span_id": f"{next(_SPAN_IDS) + (os.getpid() << 32):016x}",
+        "parent_id": parent["span_id"] if parent else None,
+        "batch_id": _BATCH_ID.get(),
+        "iteration": _ITERATION.get(),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "attributes": dict(attributes),
+        "status": "OK",
+    }
+    token = _CURRENT_SPAN.set(record)
+    record["start_ns"] = time.time_ns()
+    try:
+        yield
+    except BaseException as e:
+        record["status"] = "ERROR"
+        record["attributes"]["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["end_ns"] = time.time_ns()
+        _CURRENT_SPAN.reset(token)
+        with _SPANS_LOCK:
+            _SPANS.append(record)
+
+
+def add_span_attributes(**attributes):
+    """Adds attributes to the current span (no effect outside a span or when tracing is off)."""
+    current = _CURRENT_SPAN.get()
+    if current is not None:
+        current["attributes"].update(attributes)
+
+
+def _chrome_events(spans: List[dict]) -> List[dict]:
+    events = []
+    for s in spans:
+        args = dict(s["attributes"], batch_id=s["batch_id"], iteration=s["iteration"], status=s["status"])
+        events.append({
+            "name": s["name"],
+            "cat": s["category"] or "swarm",
+            "ph": "X",
+            "ts": s["start_ns"] / 1000,
+            "dur": (s["end_ns"] - s["start_ns"]) / 1000,
+            "pid": s["pid"],
+            "tid": s["tid"],
+            "args": {k: v for k, v in args.items() if v is not None},
+        })
+    return events
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 as a string, as in OTLP's JSON encoding
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_document(spans: List[dict]) -> dict:
+    otlp_spans = []
+    for s in spans:
+        attributes = dict(s["attributes"], category=s["category"], batch_id=s["batch_id"],
+                          iteration=s["iteration"], thread_id=s["tid"])
+        otlp_spans.append({
+            "traceId": _trace_id(s["batch_id"]),
+            "spanId": s["span_id"],
+            "parentSpanId": s["parent_id"] or "",
+            "name": s["name"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s["start_ns"]),
+            "endTimeUnixNano": str(s["end_ns"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None],
+            "status": {"code": 2 if s["status"] == "ERROR" else 1},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": "refactoring-swarm"}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "src.utils.tracing"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+def export_traces(trace_dir: str = None) -> Dict[str, str]:
+    """
+    Writes the collected spans to `trace_dir` (the --trace-dir one by default):
+    <prefix>.chrome.json and <prefix>.otlp.json. Exported spans are dropped from memory.
+
+    Returns:
+        {"chrome": path, "otlp": path}, or {} when there is nothing to export.
+    """
+    trace_dir = trace_dir or _TRACE_DIR
+    with _SPANS_LOCK:
+        spans, _SPANS[:] = list(_SPANS), []
+    if not trace_dir or not spans:
+        return {}
+
+    os.makedirs(trace_dir, exist_ok=True)
+    spans.sort(key=lambda s: s["start_ns"])
+    prefix = os.path.join(trace_dir, f"trace_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+    paths = {"chrome": f"{prefix}.chrome.json", "otlp": f"{prefix}.otlp.json"}
+    with open(paths["chrome"], "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": _chrome_events(spans), "displayTimeUnit": "ms"}, f)
+    with open(paths["otlp"], "w", encoding="utf-8") as f:
+        json.dump(_otlp_document(spans), f)
+    print(f"🧭 {len(spans)} spans exported to {paths['chrome']} and {paths['otlp']}")
+    return paths
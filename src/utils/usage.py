@@ -0,0 +1,151 @@
+# Tokens, time and cost of the LLM calls (per model, per agent, per batch, per run) and run budgets
+# (--token-budget / --time-budget): once a budget is spent, no new Fixer iteration is started.
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from src.utils.tracing import get_trace_context
+
+# Dollars per million tokens (input, output); override with LLM_PRICES='{"model": [input, output]}'
+DEFAULT_PRICES = {
+    "mistral-small-latest": (0.1, 0.3),
+    "mistral-medium-latest": (0.4, 2.0),
+    "mistral-large-latest": (2.0, 6.0),
+}
+
+# Last call made in this context (thread / node), for the log details
+_LAST_CALL = contextvars.ContextVar("usage_last_call", default=None)
+
+
+def _load_prices() -> Dict[str, tuple]:
+    prices = dict(DEFAULT_PRICES)
+    raw = os.getenv("LLM_PRICES")
+    if raw:
+        try:
+            prices.update({model: tuple(p) for model, p in json.loads(raw).items()})
+        except (ValueError, TypeError) as e:
+            print(f"⚠️ LLM_PRICES ignored: {e}")
+    return prices
+
+
+def token_counts(response) -> tuple:
+    """(input tokens, output tokens) reported by the provider, (0, 0) when missing."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return usage.get("input_tokens", 0) or 0, usage.get("output_tokens", 0) or 0
+    # older langchain versions: raw counters from the Mistral API
+    raw = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return raw.get("prompt_tokens", 0) or 0, raw.get("completion_tokens", 0) or 0
+
+
+def _empty() -> dict:
+    return {"calls": 0, "cache_hits": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0, "cost_usd": 0.0}
+
+
+class UsageMeter:
+    """Totals shared by all threads of the process (each --worker process has its own)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prices = _load_prices()
+        self.token_budget: Optional[int] = None
+        self.time_budget: Optional[float] = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.monotonic()
+            self.total = _empty()
+            self.by_model: Dict[str, dict] = {}
+            self.by_agent: Dict[str, dict] = {}
+            self.by_batch: Dict[str, dict] = {}
+
+    def set_budgets(self, tokens: Optional[int] = None, seconds: Optional[float] = None):
+        """Run budgets; time is counted from this call."""
+        with self.lock:
+            self.token_budget = tokens
+            self.time_budget = seconds
+            self.started = time.monotonic()
+
+    def record(self, model: str, response, seconds: float, cache_hit: bool = False) -> dict:
+        """
+        Records one LLM call. A response served from the cache costs nothing: its tokens
+        count neither in the totals nor against the budget.
+
+        Returns:
+            The call details (also available through last_call_usage() in the same context)
+        """
+        input_tokens, output_tokens = (0, 0) if cache_hit else token_counts(response)
+        price_in, price_out = self.prices.get(model, (0.0, 0.0))
+        call = {
+            "model": model,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "seconds": round(seconds, 4),
+            "cost_usd": round((input_tokens * price_in + output_tokens * price_out) / 1e6, 6),
+            "cache_hit": cache_hit,
+        }
+        context = get_trace_context()
+        with self.lock:
+            buckets = [self.total, self.by_model.setdefault(model, _empty())]
+            buckets.append(self.by_agent.setdefault(context["node"] or "other", _empty()))
+            if context["batch_id"]:
+                buckets.append(self.by_batch.setdefault(context["batch_id"], _empty()))
+            for bucket in buckets:
+                bucket["calls"] += 1
+                bucket["cache_hits"] += int(cache_hit)
+                bucket["input_tokens"] += input_tokens
+                bucket["output_tokens"] += output_tokens
+                bucket["seconds"] += seconds
+                bucket["cost_usd"] += call["cost_usd"]
+        _LAST_CALL.set(call)
+        return call
+
+    def budget_exceeded(self) -> Optional[str]:
+        """Why the run must stop if a budget is spent, None otherwise."""
+        with self.lock:
+            tokens = self.total["input_tokens"] + self.total["output_tokens"]
+            if self.token_budget is not None and tokens >= self.token_budget:
+                return f"token budget spent ({tokens}/{self.token_budget})"
+            elapsed = time.monotonic() - self.started
+            if self.time_budget is not None and elapsed >= self.time_budget:
+                return f"time budget spent ({elapsed:.0f}s/{self.time_budget:.0f}s)"
+        return None
+
+    def batch_usage(self, batch_id: str) -> dict:
+        with self.lock:
+            return _rounded(self.by_batch.get(batch_id, _empty()))
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "total": _rounded(self.total),
+                "by_model": {k: _rounded(v) for k, v in sorted(self.by_model.items())},
+                "by_agent": {k: _rounded(v) for k, v in sorted(self.by_agent.items())},
+                "by_batch": {k: _rounded(v) for k, v in sorted(self.by_batch.items())},
+                "budgets": {"tokens": self.token_budget, "seconds": self.time_budget},
+            }
+
+    def print_report(self):
+        data = self.summary()
+        total = data["total"]
+        print(f"🪙 LLM usage: {total['calls']} calls ({total['cache_hits']} cached), "
+              f"{total['input_tokens']} in / {total['output_tokens']} out tokens, "
+              f"{total['seconds']}s, ${total['cost_usd']}")
+        for agent, usage in data["by_agent"].items():
+            print(f"   - {agent}: {usage['calls']} calls, {usage['input_tokens']} in / "
+                  f"{usage['output_tokens']} out, ${usage['cost_usd']}")
+
+
+def _rounded(bucket: dict) -> dict:
+    return dict(bucket, seconds=round(bucket["seconds"], 3), cost_usd=round(bucket["cost_usd"], 6))
+
+
+def last_call_usage() -> Optional[dict]:
+    """Details of the last LLM call made in this context (for the log_experiment details)."""
+    return _LAST_CALL.get()
+
+
+USAGE = UsageMeter()
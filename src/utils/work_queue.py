@@ -0,0 +1,229 @@
+# File de batches durable (SQLite) pour le mode coordinateur / workers : plusieurs processus, sur cette
+# machine ou sur d'autres qui partagent le systeme de fichiers, se repartissent les batches.
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Set, Tuple
+
+# Un batch dont le worker ne renouvelle plus le bail (tue, machine perdue) redevient disponible
+LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "120"))
+MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+POLL_INTERVAL = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    files TEXT NOT NULL,
+    deps TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# 'done' et 'failed' sont definitifs : comme dans run_wavefront, un batch en echec ne bloque pas ses dependants
+FINISHED = ("done", "failed")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    Batches (fichiers relatifs au sandbox + ids des batches attendus), statut, bail et tentatives.
+    Une connexion par thread ; les reservations se font dans une transaction BEGIN IMMEDIATE.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit : les transactions sont ouvertes explicitement ; attente si la base est verrouillee
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout = 60000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Coordinateur ---
+
+    def enqueue(self, batches: List[List[str]], batch_dependencies: List[Set[int]], meta: dict,
+                finished: dict = None) -> bool:
+        """
+        Remplit la file (batch i -> id i). Sans effet si la file contient deja ce meme plan
+        (coordinateur relance) : les batches termines le restent.
+        `finished` : {index: resultat} de batches deja faits (ex: sautes grace au manifeste).
+
+        Returns:
+            True si la file a ete (re)creee, False si un plan identique etait deja en place.
+        """
+        plan = json.dumps([sorted(b) for b in batches])
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'plan'").fetchone()
+            if row is not None and row[0] == plan:
+                return False
+            conn.execute("DELETE FROM batches")
+            conn.execute("DELETE FROM meta")
+            for key, value in {**meta, "plan": plan}.items():
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)",
+                             (key, value if isinstance(value, str) else json.dumps(value)))
+            for i, (batch, deps) in enumerate(zip(batches, batch_dependencies)):
+                status, result = ("done", json.dumps(finished[i])) if finished and i in finished else ("pending", None)
+                conn.execute("INSERT INTO batches (id, files, deps, status, result) VALUES (?, ?, ?, ?, ?)",
+                             (i, json.dumps(batch), json.dumps(sorted(deps)), status, result))
+        return True
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> dict:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM batches GROUP BY status").fetchall()
+        return dict(rows)
+
+    def results(self) -> dict:
+        """{id: resultat (ou message d'erreur pour un batch en echec)}"""
+        rows = self._connect().execute("SELECT id, status, result, error FROM batches").fetchall()
+        return {i: (json.loads(result) if status == "done" and result else error) for i, status, result, error in rows}
+
+    def finished_batches(self, exclude: Set[int] = frozenset()) -> dict:
+        """{id: fichiers} des batches termines, hors `exclude` (ceux deja pris en compte par l'appelant)."""
+        rows = self._connect().execute(f"SELECT id, files FROM batches WHERE status IN {FINISHED}").fetchall()
+        return {i: json.loads(files) for i, files in rows if i not in exclude}
+
+    def is_finished(self) -> bool:
+        row = self._connect().execute(
+            f"SELECT COUNT(*) FROM batches WHERE status NOT IN {FINISHED}").fetchone()
+        return row[0] == 0
+
+    # --- Workers ---
+
+    def _expire_leases(self, conn, now: float):
+        """Bail expire : nouvel essai, ou echec definitif apres MAX_ATTEMPTS tentatives."""
+        conn.execute("UPDATE batches SET status = 'failed', error = 'lease expired', lease_owner = NULL "
+                     "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?", (now, MAX_ATTEMPTS))
+        conn.execute("UPDATE batches SET status = 'pending', lease_owner = NULL "
+                     "WHERE status = 'running' AND lease_expires < ?", (now,))
+
+    def claim(self, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Optional[Tuple[int, List[str], int]]:
+        """
+        Reserve un batch dont toutes les dependances sont terminees.
+
+        Returns:
+            (id, fichiers, numero de tentative) ou None si aucun batch n'est pret.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._expire_leases(conn, now)
+            finished = {i for (i,) in conn.execute(f"SELECT id FROM batches WHERE status IN {FINISHED}")}
+            for batch_id, files, deps in conn.execute(
+                    "SELECT id, files, deps FROM batches WHERE status = 'pending' ORDER BY id").fetchall():
+                if set(json.loads(deps)) <= finished:
+                    conn.execute("UPDATE batches SET status = 'running', lease_owner = ?, lease_expires = ?, "
+                                 "attempts = attempts + 1 WHERE id = ?", (worker_id, now + lease_seconds, batch_id))
+                    attempts = conn.execute("SELECT attempts FROM batches WHERE id = ?", (batch_id,)).fetchone()[0]
+                    return batch_id, json.loads(files), attempts
+        return None
+
+    def renew(self, batch_id: int, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Prolonge le bail ; False si le batch a ete repris par un autre worker entre-temps."""
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE batches SET lease_expires = ? WHERE id = ? AND lease_owner = ? "
+                                  "AND status = 'running'", (time.time() + lease_seconds, batch_id, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, batch_id: int, worker_id: str, result) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute("UPDATE batches SET status = 'done', result = ?, lease_owner = NULL, error = NULL "
+                                  "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                                  (json.dumps(result), batch_id, worker_id))
+            return cursor.rowcount == 1
+
+    def fail(self, batch_id: int, worker_id: str, error: str) -> bool:
+        """Erreur du worker : le batch repasse en attente, sauf s'il a epuise ses tentatives."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE batches SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (MAX_ATTEMPTS, error, batch_id, worker_id))
+            return cursor.rowcount == 1
+
+
+class _Heartbeat:
+    """Renouvelle le bail d'un batch en cours tant que le worker travaille dessus."""
+
+    def __init__(self, queue: WorkQueue, batch_id: int, worker_id: str, lease_seconds: float):
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(queue, batch_id, worker_id, lease_seconds), daemon=True)
+
+    def _run(self, queue, batch_id, worker_id, lease_seconds):
+        while not self.stop_event.wait(lease_seconds / 3):
+            try:
+                if not queue.renew(batch_id, worker_id, lease_seconds):
+                    print(f"⚠️ Bail perdu sur le batch {batch_id} (repris par un autre worker).")
+                    return
+            except sqlite3.Error as e:
+                print(f"⚠️ Renouvellement du bail impossible ({batch_id}) : {e}")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        return False
+
+
+def run_worker(queue: WorkQueue, process: Callable[[List[str], int], object], worker_id: str = None,
+               lease_seconds: float = LEASE_SECONDS, poll_interval: float = POLL_INTERVAL) -> int:
+    """
+    Boucle d'un worker : reserve un batch pret, appelle `process(fichiers, tentative)`, publie le resultat.
+    S'arrete quand toute la file est terminee.
+
+    Returns:
+        Nombre de batches traites par ce worker.
+    """
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while True:
+        claimed = queue.claim(worker_id, lease_seconds)
+        if claimed is None:
+            if queue.is_finished():
+                return processed
+            time.sleep(poll_interval)  # dependances en cours chez d'autres workers
+            continue
+
+        batch_id, files, attempt = claimed
+        with _Heartbeat(queue, batch_id, worker_id, lease_seconds):
+            try:
+                result = process(files, attempt)
+            except Exception as e:
+                queue.fail(batch_id, worker_id, f"{type(e).__name__}: {e}")
+                continue
+        queue.complete(batch_id, worker_id, result)
+        processed += 1
@@ -0,0 +1,27 @@
+from src.prompts.budget import count_tokens, fit_to_budget
+
+
+def test_fit_to_budget_cuts_inside_a_single_long_line():
+    text = "start-" + "x" * 10000 + "-end"
+
+    result = fit_to_budget(text, 200)
+
+    assert count_tokens(result) <= 200
+    assert result.startswith("start-")
+    assert result.endswith("-end")
+    assert "characters truncated to fit the token budget" in result
+
+
+def test_fit_to_budget_keeps_head_and_tail_lines():
+    text = "\n".join(f"line {i}" for i in range(1000))
+
+    result = fit_to_budget(text, 100)
+
+    assert count_tokens(result) <= 100
+    assert result.startswith("line 0\n")
+    assert result.endswith("line 999")
+    assert "lines truncated to fit the token budget" in result
+
+
+def test_fit_to_budget_returns_short_text_unchanged():
+    assert fit_to_budget("short", 100) == "short"